@@ -1,18 +1,18 @@
 # backend/app/routers/offers_v2.py
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional, List, Dict, Any, Tuple
 
-from ..schemas.offers_v2 import OfferOut, OfferListOut
-from ..services.merchant_auth import get_restaurant_id_from_request, require_key
-
-try:
-    from ..database import get_db
-except Exception:
-    from database import get_db  # type: ignore
+import asyncpg
 
+from ..schemas.offers_v2 import OfferOut, OfferListOut
+from ..services.merchant_auth import get_restaurant_id_from_request, require_key, verify_key
+from ..services import offer_queries as oq
+
+# Runs on the application's asyncpg pool (request.app.state.pool, set by main.py; reads
+# may go to the replica via request.app.state.reads) and the same query shapes as
+# main.py, on the cents-based offers schema. Writes that change what buyers see report
+# through request.app.state.offers_written (main._offers_written: public feed + read
+# stickiness), exactly like the main.py handlers.
 router = APIRouter(prefix="/api/v1/merchant", tags=["merchant_offers_v2"])
 
 def compute_discount_percent(price: Optional[float], original_price: Optional[float]) -> Optional[int]:
@@ -23,215 +23,120 @@ def compute_discount_percent(price: Optional[float], original_price: Optional[fl
     except Exception:
         return None
 
-def rows_to_offers(rows: List[Dict[str, Any]]) -> List[OfferOut]:
+def rows_to_offers(rows: List[asyncpg.Record], counts: Optional[Dict[int, Tuple[int, int]]] = None) -> List[OfferOut]:
+    # price, discount_percent, defaults and photo_url come computed from oq.OFFER_COLUMNS
+    counts = counts or {}
     out: List[OfferOut] = []
-    now = datetime.now(timezone.utc)
     for r in rows:
+        res, red = counts.get(r["id"], (0, 0))
         o = OfferOut(
             id=r["id"],
             restaurant_id=r["restaurant_id"],
-            title=r.get("title") or "",
-            description=r.get("description") or "",
-            price=r.get("price"),
-            original_price=r.get("original_price"),
-            discount_percent=r.get("discount_percent") if r.get("discount_percent") is not None else compute_discount_percent(r.get("price"), r.get("original_price")),
-            qty_total=r.get("qty_total"),
-            qty_left=r.get("qty_left"),
-            status=r.get("status") or "active",
-            expires_at=r.get("expires_at"),
-            photo_url=r.get("photo_url"),
-            reservations_count=r.get("reservations_count") or 0,
-            redemptions_count=r.get("redemptions_count") or 0,
-            created_at=r.get("created_at"),
-            updated_at=r.get("updated_at"),
+            title=r["title"],
+            description=r["description"] or "",
+            price=r["price"],
+            original_price=r["original_price"],
+            discount_percent=r["discount_percent"],
+            qty_total=r["qty_total"],
+            qty_left=r["qty_left"],
+            status=r["status"],
+            expires_at=r["expires_at"],
+            photo_url=r["photo_url"],
+            reservations_count=res,
+            redemptions_count=red,
+            created_at=r["created_at"],
+            updated_at=r["updated_at"],
         )
-        if o.expires_at and o.status not in ("expired","archived"):
-            try:
-                exp = o.expires_at if isinstance(o.expires_at, datetime) else datetime.fromisoformat(str(o.expires_at))
-                if exp.tzinfo is None:
-                    from datetime import timezone as _tz
-                    exp = exp.replace(tzinfo=_tz.utc)
-                if exp < now:
-                    o.status = "expired"
-            except Exception:
-                pass
         out.append(o)
     return out
 
-def map_sort(sort: Optional[str]) -> str:
-    if not sort:
-        return "expires_at ASC"
-    desc = sort.startswith("-")
-    field = sort[1:] if desc else sort
-    mapping = {
-        "expires_at": "expires_at",
-        "qty_left": "qty_left",
-        "discount_percent": "discount_percent",
-        "revenue": "created_at",  # fallback
-        "created_at": "created_at"
-    }
-    col = mapping.get(field, "expires_at")
-    order = "DESC" if desc else "ASC"
-    return f"{col} {order}"
-
-def build_filters(status: Optional[str], q: Optional[str]) -> str:
-    conds = ["o.deleted_at IS NULL"]
-    if status:
-        statuses = ",".join([f":st_{i}" for i,_ in enumerate(status.split(","))])
-        conds.append(f"o.status IN ({statuses})")
-    if q:
-        conds.append("(o.title ILIKE :q OR o.description ILIKE :q OR CAST(o.id AS TEXT) ILIKE :q)")
-    return " AND ".join(conds)
+async def _authorized(request: Request, conn: asyncpg.Connection, replica: bool = False) -> int:
+    key = require_key(request)
+    rid = get_restaurant_id_from_request(request)
+    if not rid:
+        raise HTTPException(status_code=400, detail="restaurant_id is required")
+    await verify_key(conn, request.app.state.auth_cache, rid, key,
+                     primary=request.app.state.pool if replica else None)
+    return rid
 
-def bind_params(status: Optional[str], q: Optional[str]):
-    params = {}
-    if status:
-        for i, s in enumerate(status.split(",")):
-            params[f"st_{i}"] = s.strip()
-    if q:
-        params["q"] = f"%{q.strip()}%"
-    return params
+def _read_pool(request: Request):
+    """Replica or primary for this restaurant's reads (main._reads; sticky after its writes)."""
+    rid = get_restaurant_id_from_request(request)
+    return request.app.state.reads.pick(*([rid] if rid else []))
 
 @router.get("/offers", response_model=OfferListOut)
-def list_offers(
+async def list_offers(
     request: Request,
     status: Optional[str] = Query(None),
     q: Optional[str] = None,
-    sort: Optional[str] = Query("expires_at"),
-    page: int = 1,
-    limit: int = 50,
-    db: Session = Depends(get_db),
+    sort: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=200),
 ):
-    require_key(request)
-    rid = get_restaurant_id_from_request(request)
-    if not rid:
-        raise HTTPException(status_code=400, detail="restaurant_id is required")
-
-    where_sql = build_filters(status, q)
-    sort_sql = map_sort(sort)
-    offset = max(0, (page - 1) * limit)
-    sql = text(f"""
-        SELECT o.*,
-               CASE WHEN o.original_price IS NOT NULL AND o.original_price > 0
-                    THEN ROUND( (1 - o.price / o.original_price) * 100 )
-                    ELSE NULL END AS discount_percent
-        FROM offers o
-        WHERE o.restaurant_id = :rid AND {where_sql}
-        ORDER BY {sort_sql}
-        LIMIT :limit OFFSET :offset
-    """)
-    params = {"rid": rid, "limit": limit, "offset": offset}
-    params.update(bind_params(status, q))
-    rows = [dict(r) for r in db.execute(sql, params)]
-    ids = [r["id"] for r in rows] or [0]
-
-    # Batch counts
-    res_map, red_map = {}, {}
-    try:
-        res_map = {r["offer_id"]: r["c"] for r in db.execute(text("SELECT offer_id, COUNT(*) AS c FROM reservations WHERE offer_id = ANY(:ids) AND (status IS NULL OR status NOT IN ('canceled','cancelled')) GROUP BY offer_id"), {"ids": ids})}
-    except Exception:
-        res_map = {}
-    try:
-        red_map = {r["offer_id"]: r["c"] for r in db.execute(text("SELECT offer_id, COUNT(*) AS c FROM redemptions WHERE offer_id = ANY(:ids) GROUP BY offer_id"), {"ids": ids})}
-    except Exception:
-        red_map = {}
-
-    for r in rows:
-        r["reservations_count"] = int(res_map.get(r["id"], 0))
-        r["redemptions_count"] = int(red_map.get(r["id"], 0))
-
+    pool = _read_pool(request)
+    async with pool.acquire() as conn:
+        rid = await _authorized(request, conn, pool is not request.app.state.pool)
+        params, has_status, has_q = oq.list_params(rid, status, q)
+        sort_name, _, _ = oq.sort_spec(sort, has_q)
+        params.extend([limit, (page - 1) * limit])
+        rows = await conn.fetch(oq.list_sql(has_status, has_q, sort_name, False, oq.list_table(status)), *params)
+        counts = await oq.activity_counts(conn, [r["id"] for r in rows])
     return {
-        "items": rows_to_offers(rows),
+        "items": rows_to_offers(rows, counts),
         "page": page,
         "limit": limit,
         "total": None
     }
 
 @router.get("/offers/{offer_id}", response_model=OfferOut)
-def get_offer(offer_id: int, request: Request, db: Session = Depends(get_db)):
-    require_key(request)
-    rid = get_restaurant_id_from_request(request)
-    if not rid:
-        raise HTTPException(status_code=400, detail="restaurant_id is required")
-    row = db.execute(text("""
-        SELECT o.*,
-               CASE WHEN o.original_price IS NOT NULL AND o.original_price > 0
-                    THEN ROUND( (1 - o.price / o.original_price) * 100 )
-                    ELSE NULL END AS discount_percent
-        FROM offers o
-        WHERE o.id = :id AND o.restaurant_id = :rid AND (o.deleted_at IS NULL OR o.status='archived')
-        LIMIT 1
-    """), {"id": offer_id, "rid": rid}).mappings().first()
+async def get_offer(offer_id: int, request: Request):
+    pool = _read_pool(request)
+    async with pool.acquire() as conn:
+        rid = await _authorized(request, conn, pool is not request.app.state.pool)
+        row = await conn.fetchrow(oq.GET_SQL, offer_id, rid)
+        if not row:
+            row = await conn.fetchrow(oq.GET_HISTORY_SQL, offer_id, rid)
+        if not row:
+            raise HTTPException(status_code=404, detail="Offer not found")
+        counts = await oq.activity_counts(conn, [offer_id])
+    return rows_to_offers([row], counts)[0]
+
+async def _set_status(offer_id: int, request: Request, status: str) -> OfferOut:
+    async with request.app.state.pool.acquire() as conn:
+        rid = await _authorized(request, conn)
+        row = await conn.fetchrow(oq.SET_STATUS_SQL, offer_id, rid, status)
+    request.app.state.offers_written(rid)
     if not row:
         raise HTTPException(status_code=404, detail="Offer not found")
-    try:
-        res = db.execute(text("SELECT COUNT(*) FROM reservations WHERE offer_id=:id AND (status IS NULL OR status NOT IN ('canceled','cancelled'))"), {"id": offer_id}).scalar()
-        red = db.execute(text("SELECT COUNT(*) FROM redemptions WHERE offer_id=:id"), {"id": offer_id}).scalar()
-    except Exception:
-        res, red = 0, 0
-    d = dict(row)
-    d["reservations_count"], d["redemptions_count"] = int(res or 0), int(red or 0)
-    return rows_to_offers([d])[0]
+    return rows_to_offers([row])[0]
 
 @router.patch("/offers/{offer_id}/pause", response_model=OfferOut)
-def pause_offer(offer_id: int, request: Request, db: Session = Depends(get_db)):
-    require_key(request)
-    rid = get_restaurant_id_from_request(request)
-    if not rid:
-        raise HTTPException(status_code=400, detail="restaurant_id is required")
-    upd = db.execute(text("UPDATE offers SET status='paused', updated_at=NOW() WHERE id=:id AND restaurant_id=:rid AND deleted_at IS NULL RETURNING *"), {"id": offer_id, "rid": rid}).mappings().first()
-    if not upd:
-        raise HTTPException(status_code=404, detail="Offer not found")
-    return rows_to_offers([dict(upd)])[0]
+async def pause_offer(offer_id: int, request: Request):
+    return await _set_status(offer_id, request, "paused")
 
 @router.patch("/offers/{offer_id}/resume", response_model=OfferOut)
-def resume_offer(offer_id: int, request: Request, db: Session = Depends(get_db)):
-    require_key(request)
-    rid = get_restaurant_id_from_request(request)
-    if not rid:
-        raise HTTPException(status_code=400, detail="restaurant_id is required")
-    upd = db.execute(text("UPDATE offers SET status='active', updated_at=NOW() WHERE id=:id AND restaurant_id=:rid AND deleted_at IS NULL RETURNING *"), {"id": offer_id, "rid": rid}).mappings().first()
-    if not upd:
-        raise HTTPException(status_code=404, detail="Offer not found")
-    return rows_to_offers([dict(upd)])[0]
+async def resume_offer(offer_id: int, request: Request):
+    return await _set_status(offer_id, request, "active")
 
 @router.post("/offers/{offer_id}/duplicate", response_model=OfferOut)
-def duplicate_offer(offer_id: int, request: Request, db: Session = Depends(get_db)):
-    require_key(request)
-    rid = get_restaurant_id_from_request(request)
-    if not rid:
-        raise HTTPException(status_code=400, detail="restaurant_id is required")
-    src = db.execute(text("SELECT * FROM offers WHERE id=:id AND restaurant_id=:rid AND deleted_at IS NULL"), {"id": offer_id, "rid": rid}).mappings().first()
-    if not src:
+async def duplicate_offer(offer_id: int, request: Request):
+    async with request.app.state.pool.acquire() as conn:
+        rid = await _authorized(request, conn)
+        new = await conn.fetchrow(oq.DUPLICATE_SQL, offer_id, rid)
+    # a draft: not in the public feed
+    request.app.state.reads.wrote(rid)
+    if not new:
         raise HTTPException(status_code=404, detail="Offer not found")
-    ins = text("""
-        INSERT INTO offers (restaurant_id,title,description,price,original_price,qty_total,qty_left,status,expires_at,photo_url,created_at,updated_at)
-        VALUES (:rid, :title, :description, :price, :orig, :qty_total, :qty_left, 'draft', :expires_at, :photo_url, NOW(), NOW())
-        RETURNING *
-    """)
-    params = {
-        "rid": rid,
-        "title": src.get("title"),
-        "description": src.get("description"),
-        "price": src.get("price"),
-        "orig": src.get("original_price"),
-        "qty_total": src.get("qty_total"),
-        "qty_left": src.get("qty_left"),
-        "expires_at": src.get("expires_at"),
-        "photo_url": src.get("photo_url")
-    }
-    new = db.execute(ins, params).mappings().first()
-    return rows_to_offers([dict(new)])[0]
+    return rows_to_offers([new])[0]
 
 @router.delete("/offers/{offer_id}", response_model=dict)
-def delete_offer(offer_id: int, request: Request, db: Session = Depends(get_db)):
-    require_key(request)
-    rid = get_restaurant_id_from_request(request)
-    if not rid:
-        raise HTTPException(status_code=400, detail="restaurant_id is required")
-    upd = db.execute(text("UPDATE offers SET status='archived', deleted_at=NOW(), updated_at=NOW() WHERE id=:id AND restaurant_id=:rid AND deleted_at IS NULL RETURNING id"), {"id": offer_id, "rid": rid}).first()
-    if not upd:
-        existed = db.execute(text("SELECT 1 FROM offers WHERE id=:id AND restaurant_id=:rid"), {"id": offer_id, "rid": rid}).first()
-        if not existed:
-            raise HTTPException(status_code=404, detail="Offer not found")
+async def delete_offer(offer_id: int, request: Request):
+    async with request.app.state.pool.acquire() as conn:
+        rid = await _authorized(request, conn)
+        res = await conn.execute(oq.ARCHIVE_SQL, offer_id, rid)
+        if not res.endswith(" 1"):
+            existed = await conn.fetchrow("SELECT 1 FROM offers_all WHERE id=$1 AND restaurant_id=$2", offer_id, rid)
+            if not existed:
+                raise HTTPException(status_code=404, detail="Offer not found")
+    request.app.state.offers_written(rid)
     return {"ok": True, "id": offer_id}
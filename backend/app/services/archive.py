@@ -0,0 +1,113 @@
+# backend/app/services/archive.py
+from typing import List, Optional, Tuple
+
+import asyncpg
+
+from app.services.offer_stream import QUIET_SETTING
+
+# Hot/cold split: `offers` keeps live rows plus recently expired/archived ones; older
+# cold rows move in batches to `offers_history` (same columns). Public reads only ever
+# want live offers, so they stay on `offers` and its size tracks the live set instead
+# of all history. Merchant reads that ask for cold statuses go through the `offers_all`
+# view (offers UNION ALL offers_history); see offer_queries.list_table. History carries
+# the same keyset and search indexes as offers, so each branch of the view is an index
+# scan and a page is a Merge Append of two short ranges, however much history there is.
+
+COLD_STATUSES = ("archived", "expired")
+
+def cold_predicate(alias: str = "") -> str:
+    # the partial index idx_offers_cold (migration 12) has this predicate
+    a = alias
+    return f"({a}status IN ('archived','expired') OR {a}deleted_at IS NOT NULL)"
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS offers_history (LIKE offers INCLUDING DEFAULTS INCLUDING GENERATED);
+ALTER TABLE offers_history ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ NOT NULL DEFAULT now();
+CREATE UNIQUE INDEX IF NOT EXISTS uq_offers_history_id ON offers_history (id);
+CREATE INDEX IF NOT EXISTS idx_offers_history_rest_status ON offers_history (restaurant_id, status, expires_at);
+CREATE INDEX IF NOT EXISTS idx_offers_cold ON offers (updated_at) WHERE {cold_predicate()};
+-- keyset keys: the expressions of offer_queries.LIST_SORT_KEYS (main._m004 on offers)
+CREATE INDEX IF NOT EXISTS idx_offers_history_rest_key_expires ON offers_history (restaurant_id, (COALESCE(expires_at, 'infinity'::timestamptz)), id);
+CREATE INDEX IF NOT EXISTS idx_offers_history_rest_key_qty ON offers_history (restaurant_id, qty_left, id);
+CREATE INDEX IF NOT EXISTS idx_offers_history_rest_key_created ON offers_history (restaurant_id, (COALESCE(created_at, '-infinity'::timestamptz)), id);
+CREATE INDEX IF NOT EXISTS idx_offers_history_rest_key_discount ON offers_history (restaurant_id,
+    (CASE WHEN original_price_cents IS NOT NULL AND original_price_cents>0 THEN (1.0 - (price_cents::float / original_price_cents::float)) ELSE 0 END), id);
+CREATE INDEX IF NOT EXISTS idx_offers_history_search ON offers_history USING GIN (search_tsv);
+"""
+
+# needs pg_trgm, which main._m002 only creates where permitted
+TRGM_SQL = "CREATE INDEX IF NOT EXISTS idx_offers_history_title_trgm ON offers_history USING GIN (title gin_trgm_ops);"
+
+_COLUMNS_SQL = """
+    SELECT column_name, format_type(a.atttypid, a.atttypmod) AS type, c.is_generated = 'ALWAYS' AS generated
+      FROM information_schema.columns c
+      JOIN pg_attribute a ON a.attrelid = 'offers'::regclass AND a.attname = c.column_name
+     WHERE c.table_schema = current_schema() AND c.table_name = 'offers'
+     ORDER BY c.ordinal_position
+"""
+
+async def sync_history(conn: asyncpg.Connection) -> List[str]:
+    """
+    Bring offers_history and the offers_all view up to the current offers columns (a
+    later `ALTER TABLE offers ADD COLUMN` only needs this re-run); returns the columns
+    an archive batch copies (everything but generated ones).
+    """
+    cols = await conn.fetch(_COLUMNS_SQL)
+    have = {r["column_name"] for r in await conn.fetch(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = 'offers_history'")}
+    for c in cols:
+        if c["column_name"] not in have and not c["generated"]:
+            await conn.execute(f'ALTER TABLE offers_history ADD COLUMN IF NOT EXISTS "{c["column_name"]}" {c["type"]}')
+    names = ", ".join(f'"{c["column_name"]}"' for c in cols)
+    await conn.execute(f"""
+        CREATE OR REPLACE VIEW offers_all AS
+        SELECT {names} FROM offers
+        UNION ALL
+        SELECT {names} FROM offers_history
+    """)
+    return [c["column_name"] for c in cols if not c["generated"]]
+
+def archive_sql(columns: List[str]) -> str:
+    names = ", ".join(f'"{c}"' for c in columns)
+    # rows with an open hold stay put (cancel / hold expiry still return stock to them)
+    return f"""
+        WITH moved AS (
+            DELETE FROM offers
+             WHERE id IN (SELECT o.id FROM offers o
+                           WHERE {cold_predicate("o.")}
+                             AND o.updated_at < now() - make_interval(days => $2)
+                             AND NOT EXISTS (SELECT 1 FROM reservations r WHERE r.offer_id = o.id AND r.status = 'reserved')
+                           ORDER BY o.updated_at
+                           LIMIT $1
+                             FOR UPDATE SKIP LOCKED)
+            RETURNING {names}
+        )
+        INSERT INTO offers_history ({names})
+        SELECT {names} FROM moved
+    """
+
+class Archiver:
+    """Moves cold offers to offers_history in bounded batches (one transaction each)."""
+
+    def __init__(self, after_days: int, batch: int = 1000):
+        self.after_days = int(after_days)
+        self.batch = int(batch)
+        self._sql: Optional[str] = None
+        self.moved = 0
+        self.batches = 0
+
+    async def run_once(self, conn: asyncpg.Connection) -> Tuple[int, bool]:
+        """(rows moved, more left) for one batch."""
+        if self._sql is None:
+            self._sql = archive_sql(await sync_history(conn))
+        async with conn.transaction():
+            # moved rows are cold and unchanged: no offer change NOTIFY for each of them
+            await conn.execute(f"SELECT set_config('{QUIET_SETTING}', 'on', true)")
+            res = await conn.execute(self._sql, self.batch, self.after_days)
+        n = int(res.split()[-1]) if res else 0
+        self.moved += n
+        self.batches += 1
+        return n, n >= self.batch
+
+    def stats(self):
+        return {"after_days": self.after_days, "moved": self.moved, "batches": self.batches}
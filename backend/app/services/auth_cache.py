@@ -0,0 +1,87 @@
+# backend/app/services/auth_cache.py
+import time
+from collections import OrderedDict
+from typing import Dict, Set, Tuple
+
+class ApiKeyCache:
+    """
+    TTL + LRU cache of verified (restaurant_id, api_key) pairs.
+    Only successful checks are stored; a miss always falls back to the DB.
+    The cache is per-process, so revocation on another replica is bounded by `ttl`.
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 4096):
+        self.ttl = float(ttl)
+        self.maxsize = int(maxsize)
+        self._entries: "OrderedDict[Tuple[int, str], float]" = OrderedDict()
+        self._by_rid: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revocations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, restaurant_id: int, api_key: str) -> bool:
+        key = (restaurant_id, api_key)
+        exp = self._entries.get(key)
+        if exp is None:
+            self.misses += 1
+            return False
+        if exp < time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return False
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True
+
+    def put(self, restaurant_id: int, api_key: str) -> None:
+        if not self.enabled:
+            return
+        key = (restaurant_id, api_key)
+        self._entries[key] = time.monotonic() + self.ttl
+        self._entries.move_to_end(key)
+        self._by_rid.setdefault(restaurant_id, set()).add(api_key)
+        while len(self._entries) > self.maxsize:
+            old, _ = self._entries.popitem(last=False)
+            self._forget(old)
+            self.evictions += 1
+
+    def invalidate(self, restaurant_id: int) -> int:
+        """Drop every cached key of a restaurant (password change / key rotation)."""
+        keys = self._by_rid.pop(restaurant_id, set())
+        for k in keys:
+            self._entries.pop((restaurant_id, k), None)
+        self.revocations += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_rid.clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "revocations": self.revocations,
+        }
+
+    def _drop(self, key: Tuple[int, str]) -> None:
+        self._entries.pop(key, None)
+        self._forget(key)
+
+    def _forget(self, key: Tuple[int, str]) -> None:
+        keys = self._by_rid.get(key[0])
+        if keys is not None:
+            keys.discard(key[1])
+            if not keys:
+                self._by_rid.pop(key[0], None)
@@ -0,0 +1,86 @@
+# backend/app/services/db_pool.py
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import asyncpg
+
+class PoolExhausted(Exception):
+    """No connection became free within the acquire timeout."""
+
+def _pct(sorted_ms, q: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    return round(sorted_ms[min(len(sorted_ms) - 1, int(q * len(sorted_ms)))], 2)
+
+class InstrumentedPool:
+    """
+    asyncpg pool wrapper with the same `async with pool.acquire() as conn` shape that
+    records how long callers queue for a connection. Keeps counters plus the last
+    `window` wait times for percentiles; anything not overridden goes to the pool.
+    With `telemetry` (app.services.telemetry) waits are also reported under `name` and
+    connections come out wrapped so their queries are timed.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, max_size: int, acquire_timeout: Optional[float] = None,
+                 slow_ms: float = 100.0, window: int = 1024, telemetry=None, name: str = "primary"):
+        self._pool = pool
+        self.max_size = int(max_size)
+        self.acquire_timeout = acquire_timeout
+        self.slow_ms = float(slow_ms)
+        self._waits = deque(maxlen=window)
+        self.waiting = 0
+        self.in_use = 0
+        self.acquires = 0
+        self.slow = 0
+        self.timeouts = 0
+        self.max_wait_ms = 0.0
+        self.telemetry = telemetry
+        self.name = name
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        self.waiting += 1
+        t0 = time.perf_counter()
+        try:
+            conn = await self._pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise PoolExhausted(f"no database connection within {self.acquire_timeout}s")
+        finally:
+            self.waiting -= 1
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.acquires += 1
+        self._waits.append(ms)
+        if ms >= self.slow_ms:
+            self.slow += 1
+        if ms > self.max_wait_ms:
+            self.max_wait_ms = ms
+        if self.telemetry is not None:
+            self.telemetry.observe_acquire(self.name, ms / 1000.0)
+        self.in_use += 1
+        try:
+            yield self.telemetry.connection(conn, self.name) if self.telemetry is not None else conn
+        finally:
+            self.in_use -= 1
+            await self._pool.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "size": self._pool.get_size(),
+            "idle": self._pool.get_idle_size(),
+            "max_size": self.max_size,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "acquires": self.acquires,
+            "slow_acquires": self.slow,
+            "timeouts": self.timeouts,
+            "wait_ms": {"p50": _pct(waits, 0.5), "p95": _pct(waits, 0.95), "p99": _pct(waits, 0.99),
+                        "max": round(self.max_wait_ms, 2)},
+        }
@@ -0,0 +1,25 @@
+# backend/app/services/expiry.py
+from typing import List, Tuple
+
+import asyncpg
+
+# Matches the partial index idx_offers_expiring (same predicate text), so each batch
+# is an index range scan over the lapsed prefix only.
+EXPIRE_OFFERS_SQL = """
+    WITH x AS (
+        SELECT id FROM offers
+         WHERE expires_at <= now() AND status NOT IN ('archived','expired')
+         ORDER BY expires_at
+         LIMIT $1
+         FOR UPDATE SKIP LOCKED
+    )
+    UPDATE offers o SET status = 'expired', updated_at = now()
+      FROM x
+     WHERE o.id = x.id
+    RETURNING o.id, o.restaurant_id
+"""
+
+async def expire_offers(conn: asyncpg.Connection, batch: int) -> List[Tuple[int, int]]:
+    """Flip one batch of lapsed offers to 'expired'; returns touched (offer_id, restaurant_id)."""
+    rows = await conn.fetch(EXPIRE_OFFERS_SQL, batch)
+    return [(r["id"], r["restaurant_id"]) for r in rows]
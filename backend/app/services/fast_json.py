@@ -0,0 +1,37 @@
+# backend/app/services/fast_json.py
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback below produces the same JSON, only slower
+    orjson = None
+
+# Encoder for hot read paths. Offers leave SQL already shaped (see offer_queries.OFFER_COLUMNS)
+# with timestamps as datetimes; both encoders write them as isoformat(), the same text
+# FastAPI's jsonable_encoder gives, so switching an endpoint over changes no bytes clients parse.
+
+def _default(o: Any) -> Any:
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    return str(o)
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """
+    Opt-in response class: return it from a handler to skip jsonable_encoder and encode
+    with orjson (when installed). Only for plain dicts/lists, not pydantic models.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
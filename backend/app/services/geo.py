@@ -0,0 +1,93 @@
+# backend/app/services/geo.py
+import math
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9  # ~5m cell, stored on merchants.geohash
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    out = []
+    bits, ch, even = 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1; lng_lo = mid
+            else:
+                ch <<= 1; lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1; lat_lo = mid
+            else:
+                ch <<= 1; lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(lat_degrees, lng_degrees) covered by one geohash cell of `precision`."""
+    total = precision * 5
+    lng_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    coslat = max(math.cos(math.radians(lat)), 1e-6)
+    dlng = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * coslat)))
+    return max(-90.0, lat - dlat), min(90.0, lat + dlat), max(-180.0, lng - dlng), min(180.0, lng + dlng)
+
+def cover(lat: float, lng: float, radius_km: float, max_cells: int = 16) -> List[str]:
+    """
+    Geohash prefixes whose cells together cover the circle's bounding box,
+    using the finest precision that needs at most `max_cells` cells.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        h, w = cell_size(precision)
+        lat0 = math.floor((min_lat + 90.0) / h) * h - 90.0
+        lng0 = math.floor((min_lng + 180.0) / w) * w - 180.0
+        n_lat = int(math.floor((max_lat - lat0) / h)) + 1
+        n_lng = int(math.floor((max_lng - lng0) / w)) + 1
+        if n_lat * n_lng > max_cells and precision > 1:
+            continue
+        cells = set()
+        for i in range(n_lat):
+            for j in range(n_lng):
+                c_lat = min(89.999999, lat0 + (i + 0.5) * h)
+                c_lng = min(179.999999, lng0 + (j + 0.5) * w)
+                cells.add(encode(c_lat, c_lng, precision))
+        return sorted(cells)
+    return []
+
+def prefix_ranges(prefixes: List[str]) -> Tuple[List[str], List[str]]:
+    """[lo, hi) bounds for a byte-ordered (COLLATE "C") prefix scan: '{' sorts after 'z'."""
+    return list(prefixes), [p + "{" for p in prefixes]
+
+def parse_point(raw: Optional[str]) -> Optional[Tuple[float, float]]:
+    if not raw:
+        return None
+    parts = [p.strip() for p in raw.split(",")]
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lng = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
@@ -0,0 +1,109 @@
+# backend/app/services/http_cache.py
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from starlette.requests import Request
+
+from app.services.offer_stream import QUIET_SETTING
+
+# Conditional GET helpers for merchant reads. Validators come from a per-restaurant
+# version (VERSION_SQL) or the body itself, so a match can answer 304 before the
+# real query runs. Responses are per merchant key: always `private`, revalidated each use.
+
+# Offer versions: every statement that writes offers (handlers, batch, reservations,
+# expiry sweeper) adds 1 to its restaurants' counters in the same transaction, so a
+# reader sees each increment exactly when the write commits. max(updated_at) could
+# not do that: updated_at is the writer's start time, and a transaction that started
+# earlier but committed later left the max where it was (stale 304s).
+# The counter is split into VERSION_SHARDS rows per restaurant, picked by backend pid:
+# concurrent writers (reservations on different offers at closing time) increment
+# different rows instead of queueing on one; readers sum them. Transactions with
+# QUIET_SETTING (backfills, the archiver) change nothing a listing shows and skip it.
+VERSION_SHARDS = 16
+
+VERSIONS_SQL = f"""
+CREATE TABLE IF NOT EXISTS offer_versions (
+    restaurant_id INTEGER NOT NULL,
+    shard SMALLINT NOT NULL,
+    version BIGINT NOT NULL,
+    PRIMARY KEY (restaurant_id, shard)
+);
+
+CREATE OR REPLACE FUNCTION foody_offer_versions() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('{QUIET_SETTING}', true) = 'on' THEN RETURN NULL; END IF;
+    -- restaurants in order: concurrent multi-restaurant statements lock the same way round
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO offer_versions (restaurant_id, shard, version)
+        SELECT DISTINCT restaurant_id, pg_backend_pid() % {VERSION_SHARDS}, 1
+          FROM new_rows WHERE restaurant_id IS NOT NULL ORDER BY 1
+        ON CONFLICT (restaurant_id, shard) DO UPDATE SET version = offer_versions.version + 1;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO offer_versions (restaurant_id, shard, version)
+        SELECT DISTINCT restaurant_id, pg_backend_pid() % {VERSION_SHARDS}, 1
+          FROM (SELECT restaurant_id FROM new_rows UNION ALL SELECT restaurant_id FROM old_rows) r
+         WHERE restaurant_id IS NOT NULL ORDER BY 1
+        ON CONFLICT (restaurant_id, shard) DO UPDATE SET version = offer_versions.version + 1;
+    ELSE
+        INSERT INTO offer_versions (restaurant_id, shard, version)
+        SELECT DISTINCT restaurant_id, pg_backend_pid() % {VERSION_SHARDS}, 1
+          FROM old_rows WHERE restaurant_id IS NOT NULL ORDER BY 1
+        ON CONFLICT (restaurant_id, shard) DO UPDATE SET version = offer_versions.version + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- statement level: a batch of N rows is one increment per restaurant, not N
+DROP TRIGGER IF EXISTS offers_version_ins ON offers;
+CREATE TRIGGER offers_version_ins AFTER INSERT ON offers
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION foody_offer_versions();
+DROP TRIGGER IF EXISTS offers_version_upd ON offers;
+CREATE TRIGGER offers_version_upd AFTER UPDATE ON offers
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION foody_offer_versions();
+DROP TRIGGER IF EXISTS offers_version_del ON offers;
+CREATE TRIGGER offers_version_del AFTER DELETE ON offers
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION foody_offer_versions();
+"""
+
+# at most VERSION_SHARDS rows of the primary key
+VERSION_SQL = "SELECT COALESCE(sum(version), 0)::bigint AS version FROM offer_versions WHERE restaurant_id=$1"
+
+def etag(*parts: Any) -> str:
+    return '"' + hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def _etags(header: str):
+    for t in header.split(","):
+        t = t.strip()
+        yield t[2:] if t.startswith("W/") else t
+
+def not_modified(request: Request, tag: str, last_modified: Optional[datetime] = None) -> bool:
+    """True if the client's copy is current: If-None-Match wins; If-Modified-Since only without it."""
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        return any(t == tag or t == "*" for t in _etags(inm))
+    ims = request.headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+def headers(tag: str, last_modified: Optional[datetime] = None, max_age: int = 0) -> Dict[str, str]:
+    h = {
+        "ETag": tag,
+        "Cache-Control": f"private, max-age={int(max_age)}, must-revalidate",
+        "Vary": "X-Foody-Key",
+    }
+    if last_modified is not None:
+        h["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return h
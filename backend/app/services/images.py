@@ -0,0 +1,189 @@
+# backend/app/services/images.py
+import asyncio
+import hashlib
+import io
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow missing: originals are stored as-is, without variants
+    Image = None
+    ImageOps = None
+
+# name -> longest side in px; generated largest first, each one from the previous
+VARIANTS = [("full", 1280), ("card", 640), ("thumb", 320)]
+FORMATS = [("webp", "image/webp"), ("jpg", "image/jpeg")]
+MAX_PIXELS = 40_000_000
+
+_MAGIC = [
+    (b"\xff\xd8\xff", "jpg", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png", "image/png"),
+    (b"GIF87a", "gif", "image/gif"),
+    (b"GIF89a", "gif", "image/gif"),
+]
+
+class UploadError(Exception):
+    """Rejected upload; `status` is the HTTP status to surface."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+def sniff(head: bytes) -> Optional[Tuple[str, str]]:
+    """(ext, content type) from the first bytes, or None if not an accepted image."""
+    for magic, ext, ctype in _MAGIC:
+        if head.startswith(magic):
+            return ext, ctype
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    return None
+
+def prefix(digest: str) -> str:
+    return f"img/{digest[:2]}/{digest[2:4]}/{digest}"
+
+def render_variants(data: bytes) -> List[Tuple[str, str, bytes]]:
+    """
+    [(name, ext, bytes)] for every VARIANTS x FORMATS. CPU-bound, runs in a worker
+    process: JPEG draft mode decodes at reduced scale, later sizes downscale the previous one.
+    """
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    img = Image.open(io.BytesIO(data))
+    if img.format == "JPEG":
+        img.draft("RGB", (VARIANTS[0][1], VARIANTS[0][1]))
+    img = ImageOps.exif_transpose(img)
+    alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    img = img.convert("RGBA" if alpha else "RGB")
+    out = []
+    for name, side in VARIANTS:
+        img.thumbnail((side, side), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        buf = io.BytesIO()
+        img.save(buf, "WEBP", quality=80, method=4)
+        out.append((name, "webp", buf.getvalue()))
+        flat = img
+        if alpha:
+            flat = Image.new("RGB", img.size, (255, 255, 255))
+            flat.paste(img, mask=img.getchannel("A"))
+        buf = io.BytesIO()
+        flat.save(buf, "JPEG", quality=82, optimize=True, progressive=True)
+        out.append((name, "jpg", buf.getvalue()))
+    return out
+
+# stored url ".../img/ab/cd/<sha256>/<name>.<ext>"; "orig" means no variants were made
+_URL_RE = re.compile(r"/img/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}/(\w+)\.(\w+)$")
+
+def variant_urls(image_url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """{name: {webp, jpg}} next to an uploaded image's url; None for pasted urls and originals."""
+    if not image_url:
+        return None
+    m = _URL_RE.search(image_url)
+    if m is None or m.group(1) == "orig":
+        return None
+    base = image_url[: m.start(1)]
+    return {name: {ext: f"{base}{name}.{ext}" for ext, _ in FORMATS} for name, _ in VARIANTS}
+
+class ImagePipeline:
+    """
+    Content-addressed uploads: the sha256 of the bytes names the object, so a repeated
+    upload is one manifest lookup. New images are rendered on a bounded process pool
+    (at most `workers * queue_factor` in flight) and concurrent uploads of the same
+    bytes share one render.
+    """
+
+    def __init__(self, storage, workers: int = 2, queue_factor: int = 2):
+        self.storage = storage
+        self.workers = max(1, int(workers))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.workers * max(1, int(queue_factor)))
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.uploads = 0
+        self.deduped = 0
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def store(self, data: bytes, digest: str, kind: Tuple[str, str]) -> Dict[str, Any]:
+        """Manifest for the image: {digest, url, original, variants}; `deduped` if already stored."""
+        self.uploads += 1
+        manifest_key = f"{prefix(digest)}/manifest.json"
+        raw = await self.storage.get(manifest_key)
+        if raw is not None:
+            self.deduped += 1
+            return dict(json.loads(raw), deduped=True)
+        fut = self._inflight.get(digest)
+        if fut is not None:
+            self.deduped += 1
+            return dict(await asyncio.shield(fut), deduped=True)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[digest] = fut
+        try:
+            manifest = await self._render_and_put(data, digest, kind)
+            await self.storage.put(manifest_key, json.dumps(manifest).encode(), "application/json")
+            fut.set_result(manifest)
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # retrieved: no "never retrieved" warning when nobody else waited
+            raise
+        finally:
+            del self._inflight[digest]
+        return dict(manifest, deduped=False)
+
+    async def _render_and_put(self, data: bytes, digest: str, kind: Tuple[str, str]) -> Dict[str, Any]:
+        base = prefix(digest)
+        ext, ctype = kind
+        orig_key = f"{base}/orig.{ext}"
+        rendered: List[Tuple[str, str, bytes]] = []
+        if Image is not None:
+            async with self._slots:
+                try:
+                    rendered = await asyncio.get_running_loop().run_in_executor(self._pool(), render_variants, data)
+                except Exception as e:
+                    raise UploadError(415, f"cannot decode image: {e}")
+        ctypes = dict(FORMATS)
+        puts = [self.storage.put(orig_key, data, ctype)]
+        puts += [self.storage.put(f"{base}/{name}.{fext}", body, ctypes[fext]) for name, fext, body in rendered]
+        await asyncio.gather(*puts)
+        variants = variant_urls(self.storage.url(f"{base}/full.jpg")) if rendered else None
+        return {
+            "digest": digest,
+            "url": self.storage.url(f"{base}/full.jpg") if rendered else self.storage.url(orig_key),
+            "original": self.storage.url(orig_key),
+            "variants": variants,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"uploads": self.uploads, "deduped": self.deduped, "inflight": len(self._inflight),
+                "variants": Image is not None}
+
+async def read_upload(upload, max_bytes: int, chunk: int = 1 << 16) -> Tuple[bytes, str, Tuple[str, str]]:
+    """Read an UploadFile in chunks, hashing as it goes: (bytes, sha256 hex, (ext, content type))."""
+    h = hashlib.sha256()
+    parts: List[bytes] = []
+    size = 0
+    kind = None
+    while True:
+        block = await upload.read(chunk)
+        if not block:
+            break
+        if kind is None:
+            kind = sniff(block[:16])
+            if kind is None:
+                raise UploadError(415, "only JPEG, PNG, GIF or WebP images are accepted")
+        size += len(block)
+        if size > max_bytes:
+            raise UploadError(413, f"file is larger than {max_bytes} bytes")
+        h.update(block)
+        parts.append(block)
+    if kind is None:
+        raise UploadError(400, "empty file")
+    return b"".join(parts), h.hexdigest(), kind
@@ -0,0 +1,33 @@
+# backend/app/services/keyset.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+# Opaque keyset cursors: base64url(JSON {s: sort, k: last sort key, i: last id}).
+# The sort is embedded so a cursor can't be replayed against another ordering.
+
+def _pack(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"t": value.isoformat()}
+    return value
+
+def _unpack(value: Any) -> Any:
+    if isinstance(value, dict) and "t" in value:
+        return datetime.fromisoformat(value["t"])
+    return value
+
+def encode_cursor(sort: str, key: Any, last_id: int) -> str:
+    raw = json.dumps({"s": sort, "k": _pack(key), "i": int(last_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, sort: str) -> Tuple[Any, int]:
+    """Return (sort key, id) of the last row seen; ValueError if the token is malformed or for another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        if data["s"] != sort:
+            raise ValueError("cursor was issued for another sort")
+        return _unpack(data["k"]), int(data["i"])
+    except (KeyError, TypeError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError("malformed cursor") from e
@@ -16,3 +16,18 @@ def require_key(request: Request) -> str:
     if not key:
         raise HTTPException(status_code=401, detail="X-Foody-Key is required")
     return key
+
+async def verify_key(conn, cache, restaurant_id: int, api_key: str, primary=None) -> None:
+    """
+    401 unless api_key belongs to restaurant_id; verified pairs are kept in `cache` (ApiKeyCache).
+    `primary`: pool to re-check a miss on when `conn` is a replica one (a just issued key may not be there yet).
+    """
+    if cache.get(restaurant_id, api_key):
+        return
+    row = await conn.fetchrow("SELECT id FROM merchants WHERE id=$1 AND api_key=$2", restaurant_id, api_key)
+    if not row and primary is not None:
+        async with primary.acquire() as pconn:
+            row = await pconn.fetchrow("SELECT id FROM merchants WHERE id=$1 AND api_key=$2", restaurant_id, api_key)
+    if not row:
+        raise HTTPException(status_code=401, detail="invalid api key")
+    cache.put(restaurant_id, api_key)
@@ -0,0 +1,86 @@
+# backend/app/services/migrations.py
+import asyncio
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple
+
+import asyncpg
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[asyncpg.Connection], Awaitable[None]]
+    transactional: bool = True  # False for steps like CREATE INDEX CONCURRENTLY
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        component   TEXT NOT NULL,
+        version     INTEGER NOT NULL,
+        name        TEXT,
+        applied_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+        duration_ms INTEGER,
+        PRIMARY KEY (component, version)
+    );
+"""
+
+def _lock_key(component: str) -> int:
+    # stable signed 32-bit key per component for pg_advisory_lock
+    return zlib.crc32(f"foody:migrations:{component}".encode()) - (1 << 31)
+
+async def _current(conn: asyncpg.Connection, component: str) -> int:
+    try:
+        v = await conn.fetchval("SELECT max(version) FROM schema_version WHERE component=$1", component)
+    except asyncpg.UndefinedTableError:
+        return 0
+    return int(v or 0)
+
+async def migrate(conn: asyncpg.Connection, component: str, migrations: List[Migration]) -> Dict[str, Any]:
+    """
+    Apply pending `migrations` of `component` in version order.
+    Up to date is one indexed max() lookup; otherwise the caller takes a session advisory
+    lock so only one replica migrates while the others wait and then see nothing to do.
+    Non-transactional steps may use CONCURRENTLY.
+    """
+    t0 = time.perf_counter()
+    latest = max((m.version for m in migrations), default=0)
+    start = await _current(conn, component)
+    out: Dict[str, Any] = {"component": component, "from": start, "to": start, "applied": []}
+    if start >= latest:
+        out["ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+        return out
+
+    key = _lock_key(component)
+    # polled rather than a blocking pg_advisory_lock: a waiter blocked inside that statement
+    # holds a snapshot, which a CREATE INDEX CONCURRENTLY step of the migrating replica waits
+    # out — a deadlock between the two
+    while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", key):
+        await asyncio.sleep(0.5)
+    try:
+        await conn.execute(SCHEMA_VERSION_DDL)
+        current = await _current(conn, component)  # another replica may have finished meanwhile
+        out["to"] = current
+        for m in sorted(migrations, key=lambda m: m.version):
+            if m.version <= current:
+                continue
+            s0 = time.perf_counter()
+            if m.transactional:
+                async with conn.transaction():
+                    await m.apply(conn)
+                    ms = int((time.perf_counter() - s0) * 1000.0)
+                    await conn.execute(
+                        "INSERT INTO schema_version (component, version, name, duration_ms) VALUES ($1,$2,$3,$4)",
+                        component, m.version, m.name, ms,
+                    )
+            else:
+                await m.apply(conn)
+                ms = int((time.perf_counter() - s0) * 1000.0)
+                await conn.execute(
+                    "INSERT INTO schema_version (component, version, name, duration_ms) VALUES ($1,$2,$3,$4)",
+                    component, m.version, m.name, ms,
+                )
+            out["applied"].append({"version": m.version, "name": m.name, "ms": ms})
+            out["to"] = m.version
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", key)
+    out["ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    return out
@@ -0,0 +1,190 @@
+# backend/app/services/notifications.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+# Buyer subscriptions (a restaurant, or an area around a point) and the outbox the bot
+# delivers from. A trigger records an event whenever an offer becomes available —
+# created active, activated from draft/paused, or restocked from 0 by the merchant —
+# whichever handler or replica made the write; at most one per offer per cooldown, so
+# pause/resume toggling doesn't spam. Stock coming back from a cancelled or lapsed hold
+# is not a restock: those statements set STOCK_RETURN_SETTING for their transaction.
+# The bot claims events with a lease that every recipients page renews, pages through the
+# matching chats (grouped per chat, keyset on chat_id) and marks the events done.
+
+COOLDOWN = "1 hour"
+STOCK_RETURN_SETTING = "foody.stock_return"
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id BIGSERIAL PRIMARY KEY,
+    chat_id BIGINT NOT NULL,
+    restaurant_id INTEGER,
+    lat DOUBLE PRECISION,
+    lng DOUBLE PRECISION,
+    radius_km REAL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CHECK ((restaurant_id IS NULL) = (lat IS NOT NULL AND lng IS NOT NULL AND radius_km IS NOT NULL))
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_subscriptions_rest ON subscriptions (restaurant_id, chat_id) WHERE restaurant_id IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_subscriptions_area ON subscriptions (chat_id) WHERE restaurant_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_subscriptions_chat ON subscriptions (chat_id);
+CREATE INDEX IF NOT EXISTS idx_subscriptions_area_lat ON subscriptions (lat) WHERE restaurant_id IS NULL;
+
+CREATE TABLE IF NOT EXISTS offer_events (
+    id BIGSERIAL PRIMARY KEY,
+    offer_id INTEGER NOT NULL,
+    restaurant_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    claimed_at TIMESTAMPTZ,
+    done_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS idx_offer_events_pending ON offer_events (id) WHERE done_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_offer_events_offer ON offer_events (offer_id, created_at);
+"""
+
+# pruning (migration 13)
+DONE_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_offer_events_done ON offer_events (done_at) WHERE done_at IS NOT NULL;"
+
+EVENTS_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION foody_offer_events() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status = 'active' AND NEW.deleted_at IS NULL
+       AND (NEW.qty_left IS NULL OR NEW.qty_left > 0)
+       AND (NEW.expires_at IS NULL OR NEW.expires_at > now())
+       AND (TG_OP = 'INSERT' OR OLD.status IS DISTINCT FROM 'active'
+            OR (COALESCE(OLD.qty_left, 1) <= 0 AND current_setting('{STOCK_RETURN_SETTING}', true) IS DISTINCT FROM 'on')) THEN
+        IF NOT EXISTS (SELECT 1 FROM offer_events e
+                        WHERE e.offer_id = NEW.id AND e.created_at > now() - interval '{COOLDOWN}') THEN
+            INSERT INTO offer_events (offer_id, restaurant_id, kind)
+            VALUES (NEW.id, NEW.restaurant_id,
+                    CASE WHEN TG_OP = 'INSERT' OR OLD.status IN ('draft', 'scheduled') THEN 'new' ELSE 'restock' END);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS offers_events ON offers;
+CREATE TRIGGER offers_events AFTER INSERT OR UPDATE OF status, qty_left ON offers
+    FOR EACH ROW EXECUTE FUNCTION foody_offer_events();
+"""
+
+async def subscribe_restaurant(conn: asyncpg.Connection, chat_id: int, restaurant_id: int) -> bool:
+    """False if the restaurant doesn't exist."""
+    row = await conn.fetchrow("""
+        INSERT INTO subscriptions (chat_id, restaurant_id)
+        SELECT $1, m.id FROM merchants m WHERE m.id = $2
+        ON CONFLICT (restaurant_id, chat_id) WHERE restaurant_id IS NOT NULL DO NOTHING
+        RETURNING id
+    """, chat_id, restaurant_id)
+    return row is not None or bool(await conn.fetchval("SELECT 1 FROM merchants WHERE id=$1", restaurant_id))
+
+async def subscribe_area(conn: asyncpg.Connection, chat_id: int, lat: float, lng: float, radius_km: float) -> None:
+    # one area per chat: a new location replaces the old one
+    await conn.execute("""
+        INSERT INTO subscriptions (chat_id, lat, lng, radius_km) VALUES ($1, $2, $3, $4)
+        ON CONFLICT (chat_id) WHERE restaurant_id IS NULL
+        DO UPDATE SET lat = EXCLUDED.lat, lng = EXCLUDED.lng, radius_km = EXCLUDED.radius_km, created_at = now()
+    """, chat_id, lat, lng, radius_km)
+
+async def unsubscribe(conn: asyncpg.Connection, chat_ids: Sequence[int], restaurant_id: Optional[int] = None,
+                      area: bool = False) -> int:
+    """Drop a restaurant, the area, or (neither given) everything for the chats; returns rows removed."""
+    if restaurant_id is not None:
+        res = await conn.execute("DELETE FROM subscriptions WHERE chat_id = ANY($1::bigint[]) AND restaurant_id=$2",
+                                 list(chat_ids), restaurant_id)
+    elif area:
+        res = await conn.execute("DELETE FROM subscriptions WHERE chat_id = ANY($1::bigint[]) AND restaurant_id IS NULL",
+                                 list(chat_ids))
+    else:
+        res = await conn.execute("DELETE FROM subscriptions WHERE chat_id = ANY($1::bigint[])", list(chat_ids))
+    return int(res.split()[-1]) if res else 0
+
+async def list_subscriptions(conn: asyncpg.Connection, chat_id: int) -> List[Dict[str, Any]]:
+    rows = await conn.fetch("""
+        SELECT s.restaurant_id, m.name AS restaurant_name, s.lat, s.lng, s.radius_km
+          FROM subscriptions s LEFT JOIN merchants m ON m.id = s.restaurant_id
+         WHERE s.chat_id = $1
+         ORDER BY s.restaurant_id NULLS FIRST
+    """, chat_id)
+    return [dict(r) for r in rows]
+
+_CLAIM_SQL = """
+    UPDATE offer_events e SET claimed_at = now()
+     WHERE e.id IN (SELECT id FROM offer_events
+                     WHERE done_at IS NULL AND (claimed_at IS NULL OR claimed_at < now() - make_interval(secs => $2))
+                     ORDER BY id LIMIT $1
+                       FOR UPDATE SKIP LOCKED)
+    RETURNING e.id, e.offer_id, e.kind
+"""
+
+async def claim_events(conn: asyncpg.Connection, offer_select: str, limit: int,
+                       lease_seconds: float) -> List[Tuple[int, str, asyncpg.Record]]:
+    """
+    Lease up to `limit` pending events: [(event id, kind, offer row)]. Events whose offer
+    is no longer live are closed here. `offer_select` is the SELECT of live offers to
+    extend with "AND id = ANY($1)" (the public feed query).
+    """
+    async with conn.transaction():
+        events = await conn.fetch(_CLAIM_SQL, limit, float(lease_seconds))
+        if not events:
+            return []
+        offers = {r["id"]: r for r in await conn.fetch(offer_select + " AND id = ANY($1::int[])",
+                                                        [e["offer_id"] for e in events])}
+        stale = [e["id"] for e in events if e["offer_id"] not in offers]
+        if stale:
+            await finish_events(conn, stale)
+    return [(e["id"], e["kind"], offers[e["offer_id"]]) for e in events if e["offer_id"] in offers]
+
+# chats to tell about the given events, keyset by chat_id; $4 bounds the area scan in degrees of latitude
+_RECIPIENTS_SQL = """
+    WITH ev AS (
+        SELECT e.offer_id, e.restaurant_id, m.lat, m.lng
+          FROM offer_events e JOIN merchants m ON m.id = e.restaurant_id
+         WHERE e.id = ANY($1::bigint[])
+    ), hits AS (
+        SELECT s.chat_id, ev.offer_id
+          FROM ev JOIN subscriptions s ON s.restaurant_id = ev.restaurant_id AND s.chat_id > $2
+        UNION
+        SELECT s.chat_id, ev.offer_id
+          FROM ev JOIN subscriptions s
+            ON s.restaurant_id IS NULL AND s.chat_id > $2
+           AND ev.lat IS NOT NULL AND ev.lng IS NOT NULL
+           AND s.lat BETWEEN ev.lat - $4 AND ev.lat + $4
+           AND 2 * 6371.0088 * asin(least(1.0, sqrt(
+                   power(sin(radians(s.lat - ev.lat) / 2), 2)
+                 + cos(radians(ev.lat)) * cos(radians(s.lat)) * power(sin(radians(s.lng - ev.lng) / 2), 2)))) <= s.radius_km
+    )
+    SELECT chat_id, array_agg(offer_id ORDER BY offer_id) AS offer_ids
+      FROM hits
+     GROUP BY chat_id
+     ORDER BY chat_id
+     LIMIT $3
+"""
+
+async def recipients(conn: asyncpg.Connection, event_ids: Sequence[int], after_chat: int, limit: int,
+                     max_radius_km: float) -> List[Tuple[int, List[int]]]:
+    """[(chat_id, offer ids)] with chat_id > after_chat, at most `limit` chats."""
+    rows = await conn.fetch(_RECIPIENTS_SQL, list(event_ids), after_chat, limit, max_radius_km / 111.0)
+    return [(r["chat_id"], list(r["offer_ids"])) for r in rows]
+
+async def extend_lease(conn: asyncpg.Connection, event_ids: Sequence[int]) -> None:
+    """Renew the claim on events still being delivered (a fan-out can outlast one lease)."""
+    await conn.execute("UPDATE offer_events SET claimed_at = now() WHERE id = ANY($1::bigint[]) AND done_at IS NULL",
+                       list(event_ids))
+
+async def prune_events(conn: asyncpg.Connection, keep_days: int, batch: int) -> int:
+    """Delete one batch of events delivered more than `keep_days` ago; returns rows removed."""
+    res = await conn.execute("""
+        DELETE FROM offer_events
+         WHERE id IN (SELECT id FROM offer_events
+                       WHERE done_at < now() - make_interval(days => $1)
+                       ORDER BY done_at
+                       LIMIT $2)
+    """, keep_days, batch)
+    return int(res.split()[-1]) if res else 0
+
+async def finish_events(conn: asyncpg.Connection, event_ids: Sequence[int]) -> None:
+    await conn.execute("UPDATE offer_events SET done_at = now() WHERE id = ANY($1::bigint[])", list(event_ids))
@@ -0,0 +1,252 @@
+# backend/app/services/offer_queries.py
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+
+from app.services.archive import COLD_STATUSES
+
+# Query shapes shared by main.py and app/routers/offers_v2.py (one set of plans to tune).
+# Texts depend only on which filters are present, never on their values or count, so
+# each combination is one prepared statement in asyncpg's per-connection cache.
+
+def offer_columns(alias: str = "") -> str:
+    """
+    Offer select list already in API shape: cents -> price, discount_percent, title/status
+    defaults and the photo_url alias are computed by Postgres, so a row only needs dict()
+    (see main._serialize_offer). Timestamps stay timestamptz for the JSON encoder.
+    """
+    a = alias
+    return f"""{a}id, {a}restaurant_id, COALESCE({a}title, '') AS title,
+           ({a}price_cents / 100.0)::float8 AS price,
+           ({a}original_price_cents / 100.0)::float8 AS original_price,
+           CASE WHEN {a}original_price_cents > 0 AND {a}price_cents IS NOT NULL
+                THEN round((1 - {a}price_cents::float8 / {a}original_price_cents) * 100)::int END AS discount_percent,
+           {a}qty_total, {a}qty_left, COALESCE({a}status, 'active') AS status, {a}expires_at,
+           {a}image_url, {a}image_url AS photo_url, {a}category, {a}description, {a}created_at, {a}updated_at"""
+
+OFFER_COLUMNS = offer_columns()
+
+# sort name -> key expression; each has a matching (restaurant_id, <key>, id) index,
+# so keyset pages are a single index range scan.
+LIST_SORT_KEYS = {
+    "expires_at": "COALESCE(expires_at, 'infinity'::timestamptz)",
+    "qty_left": "qty_left",
+    "created_at": "COALESCE(created_at, '-infinity'::timestamptz)",
+    # discount_percent — сортируем по (1 - price/original) при наличии, иначе 0
+    "discount_percent": "CASE WHEN original_price_cents IS NOT NULL AND original_price_cents>0 THEN (1.0 - (price_cents::float / original_price_cents::float)) ELSE 0 END",
+}
+
+# Search: offers.search_tsv (russian config; title A, category B, description C) with a
+# GIN index, plus the title trigram index for partial words and an exact id match.
+# Each branch is indexed, so the OR is a BitmapOr rather than a sequential scan.
+# The column is kept by a BEFORE trigger rather than GENERATED ... STORED, whose ADD
+# COLUMN rewrites the whole table under an exclusive lock (see main._m009_offers_search).
+SEARCH_CONFIG = "russian"
+
+def search_tsv_expr(alias: str = "") -> str:
+    a = alias
+    return (f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({a}title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({a}category, '')), 'B') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({a}description, '')), 'C')")
+
+SEARCH_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION foody_offer_search_tsv() RETURNS trigger AS $$
+BEGIN
+    NEW.search_tsv := {search_tsv_expr("NEW.")};
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS offers_search_tsv ON offers;
+CREATE TRIGGER offers_search_tsv BEFORE INSERT OR UPDATE OF title, category, description ON offers
+    FOR EACH ROW EXECUTE FUNCTION foody_offer_search_tsv();
+"""
+
+# one keyset batch of the backfill: ($1 last id, $2 batch) -> last id of the batch (NULL when done)
+SEARCH_BACKFILL_SQL = f"""
+    WITH b AS (SELECT id FROM offers WHERE id > $1 ORDER BY id LIMIT $2),
+    u AS (
+        UPDATE offers o SET search_tsv = {search_tsv_expr("o.")}
+          FROM b WHERE o.id = b.id AND o.search_tsv IS NULL
+    )
+    SELECT max(id) FROM b
+"""
+
+def search_args(q: str) -> List[Any]:
+    """Bind values for `search_cond`: query text, ILIKE pattern, exact id (or NULL)."""
+    q = q.strip()
+    oid = int(q) if q.isdigit() and len(q) <= 9 else None
+    return [q, f"%{q}%", oid]
+
+def search_cond(n: int, alias: str = "") -> str:
+    """Match on $n..$n+2 (see `search_args`)."""
+    a = alias
+    return (f"({a}search_tsv @@ websearch_to_tsquery('{SEARCH_CONFIG}', ${n}::text)"
+            f" OR {a}title ILIKE ${n+1}::text OR {a}id = ${n+2}::int)")
+
+def rank_expr(n: int, alias: str = "") -> str:
+    """Relevance: the exact id first, then ts_rank_cd over the weighted vector."""
+    a = alias
+    return (f"(CASE WHEN {a}id = ${n+2}::int THEN 1e6::float8"
+            f" ELSE ts_rank_cd({a}search_tsv, websearch_to_tsquery('{SEARCH_CONFIG}', ${n}::text))::float8 END)")
+
+def list_params(restaurant_id: int, status: Optional[str], q: Optional[str]) -> Tuple[List[Any], bool, bool]:
+    """(bind values, has_status, has_q) for `list_where` / `list_sql`: restaurant_id[, statuses][, search args]."""
+    params: List[Any] = [restaurant_id]
+    sts = [x.strip() for x in (status or "").split(",") if x.strip()]
+    if sts:
+        params.append(sts)
+    has_q = bool(q and q.strip())
+    if has_q:
+        params.extend(search_args(q))
+    return params, bool(sts), has_q
+
+def list_table(status: Optional[str]) -> str:
+    """
+    `offers`, or the offers_all view (offers + offers_history) whenever the listing can
+    contain a cold row: a status filter naming archived/expired, or no filter at all
+    (the default hides only archived, so old expired rows are part of it). Archiving
+    never changes what a listing returns.
+    """
+    sts = {x.strip() for x in (status or "").split(",") if x.strip()}
+    return "offers_all" if not sts or sts.intersection(COLD_STATUSES) else "offers"
+
+def _list_conditions(has_status: bool, has_q: bool) -> List[str]:
+    conds = ["restaurant_id=$1", "(deleted_at IS NULL OR status='archived')"]
+    n = 1
+    if has_status:
+        n += 1
+        conds.append(f"status = ANY(${n}::text[])")
+    else:
+        # default — скрываем archived, если явно не попросили
+        conds.append("status <> 'archived'")
+    if has_q:
+        conds.append(search_cond(n + 1))
+    return conds
+
+def sort_spec(sort: Optional[str], has_q: bool = False) -> Tuple[str, str, bool]:
+    """
+    (canonical sort name, key expression, descending); unknown fields fall back to expires_at.
+    With a search, no sort (or "relevance") ranks by match; its key is built by `list_sql`.
+    """
+    if has_q and (not sort or sort.lstrip("-") == "relevance"):
+        return "relevance", "", True
+    desc = sort.startswith("-") if sort else False
+    field = sort[1:] if desc else (sort or "expires_at")
+    if field not in LIST_SORT_KEYS:
+        field = "expires_at"
+    return ("-" if desc else "") + field, LIST_SORT_KEYS[field], desc
+
+@lru_cache(maxsize=None)
+def list_where(has_status: bool, has_q: bool) -> str:
+    return " AND ".join(_list_conditions(has_status, has_q))
+
+@lru_cache(maxsize=None)
+def list_sql(has_status: bool, has_q: bool, sort_name: str, keyset: bool, table: str = "offers") -> str:
+    """
+    Page query after `list_params`: keyset adds (last key, last id) then LIMIT;
+    otherwise LIMIT, OFFSET. Rows carry `_sort_key` for the next cursor.
+    `table` is `list_table(status)`.
+    """
+    _, key_sql, desc = sort_spec(sort_name, has_q)
+    n = 1 + has_status
+    if sort_name == "relevance":
+        key_sql = rank_expr(n + 1)
+    direction = "DESC" if desc else "ASC"
+    conds = _list_conditions(has_status, has_q)
+    if has_q:
+        n += 3
+    if keyset:
+        conds.append(f"({key_sql}, id) {'<' if desc else '>'} (${n+1}, ${n+2})")
+        page_sql = f"LIMIT ${n+3}"
+    else:
+        page_sql = f"LIMIT ${n+1} OFFSET ${n+2}"
+    return f"""
+        SELECT {OFFER_COLUMNS},
+               {key_sql} AS _sort_key
+          FROM {table}
+         WHERE {" AND ".join(conds)}
+         ORDER BY {key_sql} {direction}, id {direction}
+         {page_sql}
+    """
+
+def shapes() -> Dict[str, int]:
+    """Distinct list statements built so far (each one prepared once per connection)."""
+    return {"list": list_sql.cache_info().currsize, "where": list_where.cache_info().currsize}
+
+GET_SQL = f"""
+    SELECT {OFFER_COLUMNS}
+      FROM offers
+     WHERE id=$1 AND restaurant_id=$2 AND (deleted_at IS NULL OR status='archived')
+     LIMIT 1
+"""
+
+# the same lookup in history (archived/expired offers moved out by app/services/archive.py)
+GET_HISTORY_SQL = GET_SQL.replace("FROM offers", "FROM offers_history")
+
+# status change returning the new row, no re-fetch
+SET_STATUS_SQL = f"""
+    UPDATE offers SET status=$3, updated_at=now()
+     WHERE id=$1 AND restaurant_id=$2 AND deleted_at IS NULL
+    RETURNING {OFFER_COLUMNS}
+"""
+
+# copy as draft in one statement; qty_left = qty_total, expires_at kept
+DUPLICATE_SQL = f"""
+    INSERT INTO offers (merchant_id, restaurant_id, title, price_cents, original_price_cents,
+                        qty_total, qty_left, expires_at, image_url, category, description,
+                        status, created_at, updated_at)
+    SELECT merchant_id, restaurant_id, title, price_cents, original_price_cents,
+           qty_total, qty_total, expires_at, image_url, category, description,
+           'draft', now(), now()
+      FROM offers
+     WHERE id=$1 AND restaurant_id=$2 AND deleted_at IS NULL
+    RETURNING {OFFER_COLUMNS}
+"""
+
+ARCHIVE_SQL = """
+    UPDATE offers SET status='archived', deleted_at=now(), updated_at=now()
+     WHERE id=$1 AND restaurant_id=$2 AND deleted_at IS NULL
+"""
+
+# (column, pg type) an offer patch may set; statements take a value and a "was set" flag per column
+PATCH_COLS = [
+    ("title", "text"), ("price_cents", "int"), ("original_price_cents", "int"),
+    ("qty_total", "int"), ("qty_left", "int"), ("expires_at", "timestamptz"),
+    ("image_url", "text"), ("category", "text"), ("description", "text"), ("status", "text"),
+]
+
+# single-offer patch: one statement text whatever subset of columns is sent
+PATCH_ONE_SQL = (
+    "UPDATE offers SET "
+    + ", ".join(f"{c} = CASE WHEN ${2*i+4}::bool THEN ${2*i+3}::{t} ELSE {c} END" for i, (c, t) in enumerate(PATCH_COLS))
+    + ", updated_at = now() WHERE id=$1 AND restaurant_id=$2 AND deleted_at IS NULL"
+)
+
+def patch_args(cols: Dict[str, Any]) -> List[Any]:
+    """(value, was set) pairs for PATCH_ONE_SQL from a column -> value dict."""
+    args: List[Any] = []
+    for c, _ in PATCH_COLS:
+        args.extend([cols.get(c), c in cols])
+    return args
+
+# reservation / redemption counts for a whole page in one round trip
+ACTIVITY_COUNTS_SQL = """
+    SELECT i.id,
+           (SELECT count(*) FROM reservations r
+             WHERE r.offer_id = i.id AND r.status NOT IN ('canceled','cancelled'))::int AS reservations_count,
+           (SELECT count(*) FROM redemptions d WHERE d.offer_id = i.id)::int AS redemptions_count
+      FROM unnest($1::int[]) AS i(id)
+"""
+
+async def activity_counts(conn: asyncpg.Connection, offer_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+    """offer id -> (reservations, redemptions); empty when the tables don't exist yet."""
+    ids = list(offer_ids)
+    if not ids:
+        return {}
+    try:
+        rows = await conn.fetch(ACTIVITY_COUNTS_SQL, ids)
+    except asyncpg.UndefinedTableError:
+        return {}
+    return {r["id"]: (r["reservations_count"], r["redemptions_count"]) for r in rows}
@@ -0,0 +1,237 @@
+# backend/app/services/offer_stream.py
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+import asyncpg
+
+from app.services import geo
+from app.services.fast_json import dumps
+
+CHANNEL = "foody_offers"
+
+# Row trigger on offers: every committed write (API, batch, reservations, sweeper, other
+# replicas) becomes one NOTIFY with the public columns. Text fields are clipped so the
+# payload stays well under the 8000-byte NOTIFY limit. Transactions that set
+# QUIET_SETTING (schema backfills that change no public column) publish nothing.
+
+QUIET_SETTING = "foody.quiet_notify"
+NOTIFY_TRIGGER_SQL = f"""
+    CREATE OR REPLACE FUNCTION foody_offers_notify() RETURNS trigger AS $$
+    DECLARE r offers;
+    BEGIN
+        IF current_setting('{QUIET_SETTING}', true) = 'on' THEN RETURN NULL; END IF;
+        IF TG_OP = 'DELETE' THEN r := OLD; ELSE r := NEW; END IF;
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'op', lower(TG_OP),
+            'id', r.id, 'restaurant_id', r.restaurant_id,
+            'title', left(r.title, 300), 'description', left(r.description, 1500),
+            'category', left(r.category, 100), 'image_url', left(r.image_url, 1000),
+            'price_cents', r.price_cents, 'original_price_cents', r.original_price_cents,
+            'qty_total', r.qty_total, 'qty_left', r.qty_left, 'status', r.status,
+            'expires_at', r.expires_at, 'deleted_at', r.deleted_at, 'updated_at', r.updated_at
+        )::text);
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql;
+    DROP TRIGGER IF EXISTS offers_notify ON offers;
+    CREATE TRIGGER offers_notify AFTER INSERT OR UPDATE OR DELETE ON offers
+        FOR EACH ROW EXECUTE FUNCTION foody_offers_notify();
+"""
+
+Point = Tuple[float, float]
+
+def _ts(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+def _visible(row: Dict[str, Any], now: datetime) -> bool:
+    # mirrors the WHERE clause of the public feed
+    if row["op"] == "delete" or row.get("deleted_at") or row.get("status") != "active":
+        return False
+    if row.get("qty_left") is not None and row["qty_left"] <= 0:
+        return False
+    return row.get("expires_at") is None or row["expires_at"] > now
+
+class Subscription:
+    """One client: its filter and a bounded queue of pending events."""
+
+    __slots__ = ("restaurant_ids", "area", "queue")
+
+    def __init__(self, restaurant_ids: Optional[Iterable[int]], area: Optional[Tuple[float, float, float]], maxsize: int):
+        self.restaurant_ids: Optional[Set[int]] = set(restaurant_ids) if restaurant_ids else None
+        self.area = area  # (lat, lng, radius_km)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def wants(self, restaurant_id: int, point: Optional[Point]) -> bool:
+        if self.restaurant_ids is not None and restaurant_id not in self.restaurant_ids:
+            return False
+        if self.area is not None:
+            lat, lng, radius_km = self.area
+            return point is not None and geo.haversine_km(lat, lng, point[0], point[1]) <= radius_km
+        return True
+
+    def push(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # slow client: drop its backlog and have it re-fetch the list instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+def format_sse(event: Dict[str, Any]) -> str:
+    data = dumps(event.get("data")).decode("utf-8")
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+class OfferStream:
+    """
+    Offer change fan-out. One dedicated connection per process LISTENs on `CHANNEL`;
+    each notification is decoded once, passed to `on_change(restaurant_id)` (local cache
+    invalidation) and pushed as a small delta to every matching subscriber:
+    `offer` {op: "upsert", offer} / {op: "remove", id, restaurant_id}, or `resync` when
+    events may have been missed (reconnect, slow client).
+
+    `serialize` turns a decoded row into the public offer shape; `locate(restaurant_id)`
+    returns the merchant's (lat, lng) for area subscriptions.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        serialize: Callable[[Dict[str, Any]], Dict[str, Any]],
+        locate: Callable[[int], Awaitable[Optional[Point]]],
+        on_change: Optional[Callable[[Optional[int]], None]] = None,
+        max_clients: int = 1000,
+        queue_size: int = 256,
+        reconnect_seconds: float = 2.0,
+    ):
+        self.dsn = dsn
+        self._serialize = serialize
+        self._locate = locate
+        self._on_change = on_change
+        self.max_clients = int(max_clients)
+        self.queue_size = int(queue_size)
+        self.reconnect_seconds = float(reconnect_seconds)
+        self._subs: Set[Subscription] = set()
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._tasks: list = []
+        self.connected = False
+        self.received = 0
+        self.delivered = 0
+        self.reconnects = 0
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._dispatch())]
+
+    async def close(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        for t in self._tasks:
+            try:
+                await t
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def _notify(self, _conn, _pid, _channel, payload: str) -> None:
+        self.received += 1
+        self._inbox.put_nowait(payload)
+
+    async def _listen(self) -> None:
+        first = True
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _c: lost.set())
+                await conn.add_listener(CHANNEL, self._notify)
+                self.connected = True
+                if not first:
+                    # anything committed while we were away is gone: resync everyone
+                    self.reconnects += 1
+                    self._inbox.put_nowait(None)
+                first = False
+                await lost.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            finally:
+                self.connected = False
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def _dispatch(self) -> None:
+        while True:
+            payload = await self._inbox.get()
+            try:
+                await self._fan_out(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # one malformed notification must not stop the stream
+                pass
+
+    async def _fan_out(self, payload: Optional[str]) -> None:
+        if payload is None:
+            if self._on_change is not None:
+                self._on_change(None)
+            for sub in self._subs:
+                sub.push({"type": "resync"})
+            return
+        row = json.loads(payload)
+        rid = row["restaurant_id"]
+        if self._on_change is not None:
+            self._on_change(rid)
+        if not self._subs:
+            return
+        for key in ("expires_at", "deleted_at", "updated_at"):
+            row[key] = _ts(row.get(key))
+        if _visible(row, datetime.now(timezone.utc)):
+            data = {"op": "upsert", "offer": self._serialize(row)}
+        else:
+            data = {"op": "remove", "id": row["id"], "restaurant_id": rid}
+        event = {"type": "offer", "data": data}
+        point = await self._locate(rid) if any(s.area is not None for s in self._subs) else None
+        for sub in self._subs:
+            if sub.wants(rid, point):
+                sub.push(event)
+                self.delivered += 1
+
+    def subscribe(self, restaurant_ids: Optional[Iterable[int]] = None,
+                  area: Optional[Tuple[float, float, float]] = None) -> Optional[Subscription]:
+        """New subscription, or None when the process is at `max_clients`."""
+        if len(self._subs) >= self.max_clients:
+            return None
+        sub = Subscription(restaurant_ids, area, self.queue_size)
+        self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subs.discard(sub)
+
+    async def events(self, sub: Subscription, heartbeat: float,
+                     disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+        """SSE body for one subscriber; heartbeats keep proxies from closing an idle stream."""
+        try:
+            yield "retry: 3000\n\n"
+            while not await disconnected():
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "clients": len(self._subs),
+            "received": self.received,
+            "delivered": self.delivered,
+            "reconnects": self.reconnects,
+        }
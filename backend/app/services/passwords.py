@@ -0,0 +1,87 @@
+# backend/app/services/passwords.py
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+# Stored format: scrypt$<n>$<r>$<p>$<salt b64>$<hash b64>
+# Legacy format: 64 hex chars = sha256(global salt + password), upgraded on next login.
+SCHEME = "scrypt"
+DKLEN = 32
+
+def _b64(b: bytes) -> str:
+    return base64.b64encode(b).decode().rstrip("=")
+
+def _unb64(s: str) -> bytes:
+    return base64.b64decode(s + "=" * (-len(s) % 4))
+
+def legacy_sha256(pw: str, secret: str) -> str:
+    salt = hashlib.sha256(secret.encode()).hexdigest()[:16]
+    return hashlib.sha256((salt + pw).encode()).hexdigest()
+
+def _is_legacy(stored: str) -> bool:
+    return len(stored) == 64 and all(c in "0123456789abcdef" for c in stored)
+
+class PasswordHasher:
+    """
+    Per-user salted scrypt, computed on a bounded thread pool (hashlib releases the GIL
+    inside scrypt), so a burst of logins can't stall the event loop. At most
+    `workers * queue_factor` hashes are submitted at once; the rest wait in asyncio.
+    """
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1, workers: int = 2,
+                 queue_factor: int = 4, legacy_secret: str = ""):
+        self.n, self.r, self.p = int(n), int(r), int(p)
+        self.legacy_secret = legacy_secret
+        self.workers = max(1, int(workers))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.workers * max(1, int(queue_factor)))
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kdf")
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @staticmethod
+    def _scrypt(pw: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(pw.encode(), salt=salt, n=n, r=r, p=p, dklen=DKLEN, maxmem=256 * n * r + (1 << 20))
+
+    def hash_sync(self, pw: str) -> str:
+        salt = os.urandom(16)
+        dk = self._scrypt(pw, salt, self.n, self.r, self.p)
+        return f"{SCHEME}${self.n}${self.r}${self.p}${_b64(salt)}${_b64(dk)}"
+
+    def verify_sync(self, pw: str, stored: Optional[str]) -> Tuple[bool, bool]:
+        """(matches, needs_rehash)."""
+        if not stored:
+            return False, False
+        if _is_legacy(stored):
+            ok = hmac.compare_digest(stored, legacy_sha256(pw, self.legacy_secret))
+            return ok, ok
+        try:
+            scheme, n, r, p, salt, dk = stored.split("$")
+            n, r, p = int(n), int(r), int(p)
+        except ValueError:
+            return False, False
+        if scheme != SCHEME:
+            return False, False
+        ok = hmac.compare_digest(self._scrypt(pw, _unb64(salt), n, r, p), _unb64(dk))
+        return ok, ok and (n, r, p) != (self.n, self.r, self.p)
+
+    async def _run(self, fn, *args):
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+
+    async def hash(self, pw: str) -> str:
+        return await self._run(self.hash_sync, pw)
+
+    async def verify(self, pw: str, stored: Optional[str]) -> Tuple[bool, bool]:
+        return await self._run(self.verify_sync, pw, stored)
@@ -0,0 +1,167 @@
+# backend/app/services/public_feed.py
+import asyncio
+import hashlib
+import heapq
+import time
+from bisect import bisect_right
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services.fast_json import dumps
+
+# (sort_ts, id, serialized offer)
+FeedItem = Tuple[float, int, Dict[str, Any]]
+
+# loader(restaurant_ids) -> live rows; None means "all restaurants"
+FeedLoader = Callable[[Optional[Sequence[int]]], Awaitable[Iterable[Any]]]
+
+NO_EXPIRY_HORIZON = 365 * 24 * 3600  # mirrors COALESCE(expires_at, now() + interval '365 days')
+
+class _Encoded:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+class _Slice:
+    """Sorted live offers of one scope plus its encoded bodies keyed by limit."""
+
+    __slots__ = ("items", "encoded")
+
+    def __init__(self, items: List[FeedItem]):
+        self.items = items
+        self.encoded: Dict[int, _Encoded] = {}
+
+    def prune(self, now_ts: float) -> bool:
+        # items are ordered by expiry, so the expired ones are always a prefix
+        if not self.items or self.items[0][0] > now_ts:
+            return False
+        cut = bisect_right(self.items, now_ts, key=lambda it: it[0])
+        if not cut:
+            return False
+        del self.items[:cut]
+        self.encoded.clear()
+        return True
+
+    def encode(self, limit: int) -> _Encoded:
+        n = min(max(int(limit), 0), len(self.items))
+        enc = self.encoded.get(n)
+        if enc is None:
+            if len(self.encoded) >= 8:
+                self.encoded.clear()
+            enc = _Encoded(dumps([it[2] for it in self.items[:n]]))
+            self.encoded[n] = enc
+        return enc
+
+class PublicFeed:
+    """
+    Materialized public offers feed: one slice per restaurant plus a merged global slice,
+    each kept in feed order and encoded to JSON bytes on first use.
+
+    Writes call `invalidate(restaurant_id)`; the next read reloads only the dirty
+    restaurants and re-merges the global slice. Offers that pass `expires_at` are
+    pruned in memory. A full reload happens every `max_age` seconds so writes made
+    by other replicas are picked up.
+    """
+
+    def __init__(self, loader: FeedLoader, serialize: Callable[[Any], Dict[str, Any]], max_age: float = 30.0):
+        self._loader = loader
+        self._serialize = serialize
+        self.max_age = float(max_age)
+        self._slices: Dict[int, _Slice] = {}
+        self._global: Optional[_Slice] = None
+        self._dirty: set = set()
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+        self.partial_rebuilds = 0
+
+    def invalidate(self, restaurant_id: Optional[int] = None) -> None:
+        if restaurant_id is None:
+            self._loaded_at = 0.0
+        else:
+            self._dirty.add(int(restaurant_id))
+
+    def _fresh(self) -> bool:
+        return self._global is not None and not self._dirty and (time.monotonic() - self._loaded_at) < self.max_age
+
+    def _items(self, rows: Iterable[Any], now_ts: float) -> Dict[int, List[FeedItem]]:
+        by_rid: Dict[int, List[FeedItem]] = {}
+        horizon = now_ts + NO_EXPIRY_HORIZON
+        for r in rows:
+            exp = r["expires_at"]
+            ts = exp.timestamp() if exp is not None else horizon
+            by_rid.setdefault(r["restaurant_id"], []).append((ts, r["id"], self._serialize(r)))
+        for items in by_rid.values():
+            items.sort(key=lambda it: (it[0], it[1]))
+        return by_rid
+
+    def _merge(self) -> None:
+        merged = list(heapq.merge(*(s.items for s in self._slices.values()), key=lambda it: (it[0], it[1])))
+        self._global = _Slice(merged)
+
+    async def _refresh(self) -> None:
+        async with self._lock:
+            if self._fresh():
+                return
+            now_ts = time.time()
+            if self._global is None or (time.monotonic() - self._loaded_at) >= self.max_age:
+                self._dirty.clear()
+                by_rid = self._items(await self._loader(None), now_ts)
+                self._slices = {rid: _Slice(items) for rid, items in by_rid.items()}
+                self._loaded_at = time.monotonic()
+                self.rebuilds += 1
+            else:
+                dirty = sorted(self._dirty)
+                self._dirty.clear()
+                by_rid = self._items(await self._loader(dirty), now_ts)
+                for rid in dirty:
+                    items = by_rid.get(rid)
+                    if items:
+                        self._slices[rid] = _Slice(items)
+                    else:
+                        self._slices.pop(rid, None)
+                self.partial_rebuilds += 1
+            self._merge()
+
+    async def get(self, restaurant_id: Optional[int], limit: int) -> Tuple[bytes, str]:
+        """Return (json body, etag) for the global feed or one restaurant."""
+        if self._fresh():
+            self.hits += 1
+        else:
+            await self._refresh()
+        now_ts = time.time()
+        if restaurant_id:
+            sl = self._slices.get(int(restaurant_id))
+            if sl is None:
+                sl = _Slice([])
+            elif sl.prune(now_ts):
+                self._global.prune(now_ts)
+        else:
+            sl = self._global
+            if sl.prune(now_ts):
+                for s in self._slices.values():
+                    s.prune(now_ts)
+        enc = sl.encode(limit)
+        return enc.body, enc.etag
+
+    async def by_restaurant(self) -> Dict[int, List[FeedItem]]:
+        """Live items grouped by restaurant (for in-process filtering, e.g. geo fallback)."""
+        if not self._fresh():
+            await self._refresh()
+        now_ts = time.time()
+        if self._global.prune(now_ts):
+            for s in self._slices.values():
+                s.prune(now_ts)
+        return {rid: s.items for rid, s in self._slices.items() if s.items}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "restaurants": len(self._slices),
+            "offers": len(self._global.items) if self._global is not None else 0,
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+            "partial_rebuilds": self.partial_rebuilds,
+            "dirty": len(self._dirty),
+        }
@@ -0,0 +1,121 @@
+# backend/app/services/rate_limit.py
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services.fast_json import dumps
+
+# Token buckets per (route class, client) checked in ASGI middleware, i.e. before a
+# handler runs and before it can take a pool connection: a flooding client gets 429s
+# while everyone else still finds free connections.
+
+Rule = Tuple[float, float]  # (tokens per second, burst)
+
+def parse_rules(spec: str, defaults: Dict[str, Rule]) -> Dict[str, Rule]:
+    """"public=10/40,login=0.2/10" -> {class: (rate, burst)} over `defaults`; rate 0 turns a class off."""
+    rules = dict(defaults)
+    for part in (spec or "").split(","):
+        name, _, val = part.strip().partition("=")
+        if not name or not val:
+            continue
+        rate, _, burst = val.partition("/")
+        rules[name.strip()] = (float(rate), float(burst or rate))
+    return rules
+
+class LocalBuckets:
+    """
+    In-process bucket store. Each replica limits on its own, so the effective limit is
+    `replicas x rate`; a shared store only has to offer the same async `take`.
+    Least recently used buckets are dropped past `max_keys` (a dropped bucket is full).
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = int(max_keys)
+        self._buckets: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+    async def take(self, key: Tuple[str, str], rate: float, burst: float, cost: float = 1.0) -> float:
+        """0 if admitted, else seconds until `cost` tokens are available."""
+        now = time.monotonic()
+        b = self._buckets.get(key)
+        if b is None:
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            b = self._buckets[key] = [burst, now]
+        else:
+            self._buckets.move_to_end(key)
+            b[0] = min(burst, b[0] + (now - b[1]) * rate)
+            b[1] = now
+        if b[0] >= cost:
+            b[0] -= cost
+            return 0.0
+        return (cost - b[0]) / rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+# scope -> [(class, client id)] the request is charged against, or [] to let it through
+Classifier = Callable[[Dict[str, Any]], Iterable[Tuple[str, str]]]
+
+class RateLimiter:
+    """Charges a request to every bucket the classifier names; rejected if any is empty."""
+
+    def __init__(self, backend, rules: Dict[str, Rule]):
+        self.backend = backend
+        self.rules = rules
+        self.allowed = 0
+        self.limited: Dict[str, int] = {}
+
+    async def check(self, keys: Iterable[Tuple[str, str]]) -> Optional[float]:
+        """None if admitted, else Retry-After seconds."""
+        for cls, who in keys:
+            rate, burst = self.rules.get(cls, (0.0, 0.0))
+            if rate <= 0:
+                continue
+            wait = await self.backend.take((cls, who), rate, burst)
+            if wait > 0:
+                self.limited[cls] = self.limited.get(cls, 0) + 1
+                return wait
+        self.allowed += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"allowed": self.allowed, "limited": dict(self.limited),
+                "buckets": len(self.backend) if hasattr(self.backend, "__len__") else None}
+
+class RateLimitMiddleware:
+    """Pure ASGI, so streaming responses (SSE) pass through untouched once admitted."""
+
+    def __init__(self, app, limiter: RateLimiter, classify: Classifier):
+        self.app = app
+        self.limiter = limiter
+        self.classify = classify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        wait = await self.limiter.check(self.classify(scope))
+        if wait is None:
+            return await self.app(scope, receive, send)
+        body = dumps({"detail": "too many requests"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def header(scope: Dict[str, Any], name: bytes) -> Optional[str]:
+    for k, v in scope.get("headers") or ():
+        if k == name:
+            return v.decode("latin-1")
+    return None
+
+def client_ip(scope: Dict[str, Any]) -> str:
+    # behind a proxy uvicorn rewrites `client` from X-Forwarded-For (FORWARDED_ALLOW_IPS)
+    client = scope.get("client")
+    return client[0] if client else "-"
@@ -0,0 +1,83 @@
+# backend/app/services/read_routing.py
+import time
+from typing import Any, Dict, Optional
+
+# Replay lag of a streaming standby in seconds; 0 on a primary and on an idle standby that
+# has replayed everything it received (the replay timestamp alone grows while nothing is written).
+LAG_SQL = """
+    SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END::float8
+"""
+
+class ReadRouter:
+    """
+    Picks the pool for a read: the replica (DATABASE_READ_URL) unless it is lagging by
+    more than `max_lag` seconds, failed its last check, or the read concerns a restaurant
+    written in the last `sticky_seconds` — those go to the primary so a merchant sees
+    their own change. Writes are reported with `wrote(restaurant_id)`; keep
+    `sticky_seconds` above `max_lag` so the window outlasts any replica it trusts.
+    """
+
+    def __init__(self, sticky_seconds: float = 5.0, max_lag: float = 2.0, max_keys: int = 100_000):
+        self.primary: Any = None
+        self.replica: Any = None
+        self.sticky_seconds = float(sticky_seconds)
+        self.max_lag = float(max_lag)
+        self.max_keys = int(max_keys)
+        self._written: Dict[int, float] = {}
+        self._last_write = 0.0
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+
+    def wrote(self, restaurant_id: Optional[int] = None) -> None:
+        now = time.monotonic()
+        self._last_write = now
+        if restaurant_id is None:
+            return
+        self._written[int(restaurant_id)] = now + self.sticky_seconds
+        if len(self._written) > self.max_keys:
+            self._written = {rid: t for rid, t in self._written.items() if t > now}
+
+    def _sticky(self, restaurant_ids, any_write: bool) -> bool:
+        now = time.monotonic()
+        if any_write and now - self._last_write < self.sticky_seconds:
+            return True
+        return any(self._written.get(int(rid), 0.0) > now for rid in restaurant_ids)
+
+    def pick(self, *restaurant_ids: int, any_write: bool = False):
+        """
+        Pool to read from. `restaurant_ids`: the restaurants the result depends on;
+        `any_write`: the result spans all restaurants (a full reload), so any recent write counts.
+        """
+        if self.replica is None or not self.healthy:
+            self.primary_reads += 1
+            return self.primary
+        if self._sticky(restaurant_ids, any_write):
+            self.sticky_reads += 1
+            return self.primary
+        self.replica_reads += 1
+        return self.replica
+
+    async def check(self) -> None:
+        """Refresh the replica's lag; an error or too much lag sends reads to the primary until the next check."""
+        if self.replica is None:
+            return
+        try:
+            async with self.replica.acquire() as conn:
+                self.lag = await conn.fetchval(LAG_SQL)
+        except Exception:
+            self.lag = None
+            self.healthy = False
+            raise
+        self.healthy = self.lag <= self.max_lag
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replica": self.replica is not None, "healthy": self.healthy,
+            "lag_s": round(self.lag, 3) if self.lag is not None else None, "max_lag_s": self.max_lag,
+            "sticky_s": self.sticky_seconds, "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads, "sticky_reads": self.sticky_reads,
+        }
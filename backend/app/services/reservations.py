@@ -0,0 +1,186 @@
+# backend/app/services/reservations.py
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import asyncpg
+
+# no 0/O/1/I — codes are read aloud at the counter
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 8
+
+def generate_code() -> str:
+    return "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+
+class ReservationError(Exception):
+    """Reservation could not be made; `status` is the HTTP status to surface."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+class KeyedGate:
+    """
+    Per-key asyncio semaphores. Only `limit` coroutines per key go on to take a pool
+    connection and wait on the row lock; the rest queue in-process, so one hot offer
+    can't drain the pool.
+    """
+
+    def __init__(self, limit: int = 4):
+        self.limit = max(1, int(limit))
+        self._sems: Dict[Any, asyncio.Semaphore] = {}
+        self._users: Dict[Any, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: Any) -> AsyncIterator[None]:
+        sem = self._sems.get(key)
+        if sem is None:
+            sem = self._sems[key] = asyncio.Semaphore(self.limit)
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with sem:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._sems[key]
+
+# Daily rollups are split into STATS_SHARDS rows per restaurant and day, picked by backend
+# pid (merchant_daily_stats_shards, summed by the metrics read): reservations on different
+# offers of one restaurant don't queue on a single rollup row the way they would on
+# (restaurant_id, day) — only on their own offer's row.
+STATS_SHARDS = 16
+
+# One statement: the conditional UPDATE takes the row lock, re-checks qty_left after any
+# concurrent writer commits (no read-modify-write) and feeds the INSERT of the hold,
+# which in turn bumps the restaurant's daily rollup shard (day in $6 tz).
+RESERVE_SQL = f"""
+    WITH o AS (
+        UPDATE offers
+           SET qty_left = qty_left - $2, updated_at = now()
+         WHERE id = $1
+           AND status = 'active'
+           AND deleted_at IS NULL
+           AND qty_left >= $2
+           AND (expires_at IS NULL OR expires_at > now())
+        RETURNING id, restaurant_id, price_cents, expires_at
+    ), ins AS (
+        INSERT INTO reservations (offer_id, restaurant_id, code, qty, buyer, status, amount_cents, created_at, expires_at)
+        SELECT o.id, o.restaurant_id, $3, $2, $4, 'reserved', o.price_cents * $2, now(),
+               LEAST(now() + $5::int * interval '1 second', COALESCE(o.expires_at, 'infinity'::timestamptz))
+          FROM o
+        RETURNING id, offer_id, restaurant_id, code, qty, amount_cents, status, created_at, expires_at
+    ), roll AS (
+        INSERT INTO merchant_daily_stats_shards AS s (restaurant_id, day, shard, reservations)
+        SELECT restaurant_id, (created_at AT TIME ZONE $6)::date, pg_backend_pid() % {STATS_SHARDS}, 1 FROM ins
+        ON CONFLICT (restaurant_id, day, shard) DO UPDATE SET reservations = s.reservations + 1
+    )
+    SELECT * FROM ins
+"""
+
+REDEEM_SQL = f"""
+    WITH r AS (
+        UPDATE reservations
+           SET status = 'redeemed', redeemed_at = now()
+         WHERE restaurant_id = $1 AND code = $2 AND status = 'reserved' AND expires_at > now()
+        RETURNING id, offer_id, restaurant_id, code, qty, amount_cents, redeemed_at
+    ), ins AS (
+        INSERT INTO redemptions (reservation_id, offer_id, restaurant_id, code, qty, amount_cents, redeemed_at)
+        SELECT id, offer_id, restaurant_id, code, qty, amount_cents, redeemed_at FROM r
+        RETURNING reservation_id, offer_id, restaurant_id, code, qty, amount_cents, redeemed_at
+    ), roll AS (
+        INSERT INTO merchant_daily_stats_shards AS s (restaurant_id, day, shard, redemptions, revenue_cents)
+        SELECT restaurant_id, (redeemed_at AT TIME ZONE $3)::date, pg_backend_pid() % {STATS_SHARDS}, 1, amount_cents FROM ins
+        ON CONFLICT (restaurant_id, day, shard) DO UPDATE
+           SET redemptions = s.redemptions + 1, revenue_cents = s.revenue_cents + EXCLUDED.revenue_cents
+    )
+    SELECT * FROM ins
+"""
+
+# marks the transaction's stock increases as returned holds, not restocks (notifications.EVENTS_TRIGGER_SQL)
+STOCK_RETURN_SQL = "SELECT set_config('foody.stock_return', 'on', true)"
+
+CANCEL_SQL = """
+    WITH r AS (
+        UPDATE reservations SET status = 'cancelled'
+         WHERE code = $1 AND status = 'reserved'
+        RETURNING offer_id, qty
+    )
+    UPDATE offers o SET qty_left = o.qty_left + r.qty, updated_at = now()
+      FROM r
+     WHERE o.id = r.offer_id
+    RETURNING o.id, o.restaurant_id
+"""
+
+# Bounded batch; SKIP LOCKED lets several replicas sweep without blocking each other.
+EXPIRE_HOLDS_SQL = """
+    WITH x AS (
+        SELECT id FROM reservations
+         WHERE status = 'reserved' AND expires_at <= now()
+         ORDER BY expires_at
+         LIMIT $1
+         FOR UPDATE SKIP LOCKED
+    ), r AS (
+        UPDATE reservations t SET status = 'expired'
+          FROM x
+         WHERE t.id = x.id
+        RETURNING t.offer_id, t.qty
+    ), back AS (
+        UPDATE offers o SET qty_left = o.qty_left + s.qty, updated_at = now()
+          FROM (SELECT offer_id, SUM(qty)::int AS qty FROM r GROUP BY offer_id) s
+         WHERE o.id = s.offer_id
+        RETURNING o.id, o.restaurant_id
+    )
+    SELECT (SELECT count(*) FROM r)::int AS expired,
+           COALESCE((SELECT array_agg(id) FROM back), '{}') AS offer_ids,
+           COALESCE((SELECT array_agg(restaurant_id) FROM back), '{}') AS restaurant_ids
+"""
+
+async def reserve(
+    conn: asyncpg.Connection,
+    offer_id: int,
+    qty: int,
+    buyer: Optional[str],
+    hold_seconds: int,
+    lock_timeout_ms: int,
+    stats_tz: str = "UTC",
+    attempts: int = 3,
+) -> Dict[str, Any]:
+    for _ in range(attempts):
+        try:
+            async with conn.transaction():
+                await conn.execute(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}")
+                row = await conn.fetchrow(RESERVE_SQL, offer_id, qty, generate_code(), buyer, hold_seconds, stats_tz)
+        except asyncpg.UniqueViolationError:
+            continue  # code collision — the whole statement rolled back, try a new code
+        except asyncpg.LockNotAvailableError:
+            raise ReservationError(503, "offer is busy, retry")
+        if row is None:
+            exists = await conn.fetchrow("SELECT qty_left FROM offers WHERE id=$1 AND deleted_at IS NULL", offer_id)
+            if not exists:
+                raise ReservationError(404, "offer not found")
+            raise ReservationError(409, "offer is not available")
+        return dict(row)
+    raise ReservationError(503, "could not allocate reservation code, retry")
+
+async def redeem(conn: asyncpg.Connection, restaurant_id: int, code: str, stats_tz: str = "UTC") -> Optional[Dict[str, Any]]:
+    async with conn.transaction():
+        row = await conn.fetchrow(REDEEM_SQL, restaurant_id, code, stats_tz)
+    return dict(row) if row else None
+
+async def cancel(conn: asyncpg.Connection, code: str) -> Optional[Tuple[int, int]]:
+    """Release a hold; returns (offer_id, restaurant_id) or None if there is no active hold."""
+    async with conn.transaction():
+        await conn.execute(STOCK_RETURN_SQL)
+        row = await conn.fetchrow(CANCEL_SQL, code)
+    return (row["id"], row["restaurant_id"]) if row else None
+
+async def expire_holds(conn: asyncpg.Connection, batch: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """Expire one batch of lapsed holds and return their stock; (expired count, touched (offer_id, restaurant_id))."""
+    async with conn.transaction():
+        await conn.execute(STOCK_RETURN_SQL)
+        row = await conn.fetchrow(EXPIRE_HOLDS_SQL, batch)
+    return row["expired"], list(zip(row["offer_ids"], row["restaurant_ids"]))
@@ -0,0 +1,172 @@
+# backend/app/services/slow_queries.py
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from app.services.telemetry import normalize_sql
+
+# Queries slower than a threshold are logged with the shape of their parameters (types
+# and sizes, never values); a sample is re-run as EXPLAIN (ANALYZE, BUFFERS) on another
+# connection of the same pool and the plan kept in a ring buffer for GET
+# /api/v1/admin/slow_queries. Fed from Telemetry.timed, so it sees every query that goes
+# through InstrumentedPool.
+
+log = logging.getLogger("foody.slow_queries")
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS) "
+
+_READ = re.compile(r"^\s*(?:SELECT|WITH)\b", re.I)
+# writes, row locks and side-effecting functions: never re-executed, even read-only and rolled back
+_UNSAFE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE|nextval|setval|set_config|pg_notify|pg_advisory\w*)\b|"
+                     r"\bFOR\s+(?:NO\s+KEY\s+|KEY\s+)?(?:UPDATE|SHARE)\b", re.I)
+_INDEX = re.compile(r"Index (?:Only )?Scan (?:Backward )?using (\S+)|Bitmap Index Scan on (\S+)")
+_SEQ = re.compile(r"Seq Scan on (\S+)")
+
+def explainable(sql: str) -> bool:
+    return bool(_READ.match(sql)) and not _UNSAFE.search(sql)
+
+def _param(v: Any) -> str:
+    if v is None:
+        return "null"
+    if isinstance(v, bool):
+        return "bool"
+    if isinstance(v, (int, float)):
+        return type(v).__name__
+    if isinstance(v, str):
+        return f"text({len(v)})"
+    if isinstance(v, datetime):
+        return "timestamptz"
+    if isinstance(v, date):
+        return "date"
+    if isinstance(v, (list, tuple)):
+        inner = _param(v[0]).split("(")[0] if v else "?"
+        return f"{inner}[{len(v)}]"
+    return type(v).__name__
+
+def param_shape(args: Sequence[Any]) -> List[str]:
+    """Type and size of each bind parameter: ["int", "text[2]", "text(5)", "null", ...]."""
+    return [_param(a) for a in args]
+
+def plan_scans(plan: Sequence[str]):
+    """(indexes used, tables read by seq scan) in an EXPLAIN text plan."""
+    text = "\n".join(plan)
+    indexes = sorted({a or b for a, b in _INDEX.findall(text)})
+    return indexes, sorted(set(_SEQ.findall(text)))
+
+class SlowQueryLog:
+    """
+    Slow query capture. `threshold_ms`: what counts as slow; `sample_rate`: share of slow
+    queries that get an EXPLAIN, at most one per shape per `explain_interval` seconds and
+    one at a time per process, skipped while the pool has callers queued; `plans`: ring
+    buffer size. `pools`: name -> pool, the same mapping Telemetry reports gauges from.
+    """
+
+    def __init__(self, threshold_ms: float, pools: Mapping[str, Any], sample_rate: float = 0.1,
+                 explain_interval: float = 60.0, plans: int = 100, explain_timeout_ms: int = 5000,
+                 max_shapes: int = 500):
+        self.threshold = float(threshold_ms) / 1000.0
+        self.pools = pools
+        self.sample_rate = float(sample_rate)
+        self.explain_interval = float(explain_interval)
+        self.explain_timeout_ms = int(explain_timeout_ms)
+        self.max_shapes = int(max_shapes)
+        self.plans: deque = deque(maxlen=int(plans))
+        self._shapes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._last_explain: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.slow = 0
+        self.explained = 0
+        self.explain_errors = 0
+
+    def observe(self, sql: str, args: Sequence[Any], seconds: float, pool: str) -> None:
+        if seconds < self.threshold or sql.startswith(EXPLAIN_PREFIX):
+            return
+        shape = normalize_sql(sql)
+        params = param_shape(args)
+        ms = seconds * 1000.0
+        self.slow += 1
+        st = self._shapes.pop(shape, None) or {"query": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "explained": 0}
+        st["count"] += 1
+        st["total_ms"] += ms
+        st["max_ms"] = max(st["max_ms"], ms)
+        st["params"] = params
+        st["pool"] = pool
+        self._shapes[shape] = st
+        if len(self._shapes) > self.max_shapes:
+            self._shapes.popitem(last=False)
+        log.warning("slow query %.1f ms on %s params=%s: %s", ms, pool, params, shape)
+        if self._should_explain(sql, shape, pool):
+            now = time.monotonic()
+            if len(self._last_explain) >= self.max_shapes:
+                self._last_explain = {k: t for k, t in self._last_explain.items() if now - t < self.explain_interval}
+            self._last_explain[shape] = now
+            self._task = asyncio.get_running_loop().create_task(self._explain(sql, tuple(args), shape, params, ms, pool))
+
+    def _should_explain(self, sql: str, shape: str, pool: str) -> bool:
+        if self._task is not None and not self._task.done():
+            return False
+        p = self.pools.get(pool)
+        if p is None or getattr(p, "waiting", 0) > 0:
+            return False
+        if time.monotonic() - self._last_explain.get(shape, float("-inf")) < self.explain_interval:
+            return False
+        return random.random() < self.sample_rate and explainable(sql)
+
+    async def _explain(self, sql: str, args: tuple, shape: str, params: List[str], ms: float, pool: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            async with self.pools[pool].acquire() as conn:
+                # read-only and rolled back: ANALYZE really executes the statement
+                tr = conn.transaction(readonly=True)
+                await tr.start()
+                try:
+                    await conn.execute(f"SET LOCAL statement_timeout = {self.explain_timeout_ms}")
+                    rows = await conn.fetch(EXPLAIN_PREFIX + sql, *args)
+                finally:
+                    await tr.rollback()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.explain_errors += 1
+            log.warning("EXPLAIN of slow query failed (%s): %s", e, shape)
+            return
+        plan = [r[0] for r in rows]
+        indexes, seq_scans = plan_scans(plan)
+        self.explained += 1
+        st = self._shapes.get(shape)
+        if st is not None:
+            st["explained"] += 1
+        self.plans.append({
+            "at": datetime.now(timezone.utc).isoformat(), "pool": pool, "query": shape, "sql": " ".join(sql.split()),
+            "params": params, "ms": round(ms, 2), "explain_ms": round((time.perf_counter() - t0) * 1000.0, 2),
+            "indexes": indexes, "seq_scans": seq_scans, "plan": plan,
+        })
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def report(self, limit: int = 20, without_index: Optional[str] = None) -> Dict[str, Any]:
+        """Slowest shapes by total time and the newest plans (only those not using `without_index`, if given)."""
+        plans = [p for p in reversed(self.plans) if not without_index or without_index not in p["indexes"]]
+        shapes = sorted(self._shapes.values(), key=lambda s: s["total_ms"], reverse=True)
+        return {
+            **self.stats(),
+            "shapes": [{**s, "total_ms": round(s["total_ms"], 2), "max_ms": round(s["max_ms"], 2)} for s in shapes[:limit]],
+            "plans": plans[:limit],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": round(self.threshold * 1000.0, 2), "sample_rate": self.sample_rate, "slow": self.slow,
+            "explained": self.explained, "explain_errors": self.explain_errors, "plans_kept": len(self.plans),
+        }
@@ -0,0 +1,89 @@
+# backend/app/services/storage.py
+import asyncio
+import os
+from pathlib import Path
+from typing import Optional
+
+# Blob stores for uploaded media. Keys are content-addressed ("img/ab/cd/<sha256>/<name>.<ext>"),
+# so objects are immutable: put() of an existing key may be skipped and URLs cached forever.
+
+class LocalStorage:
+    """Files under `root`, served by the API at `base_url` (see GET /media/... in main.py)."""
+
+    def __init__(self, root: str, base_url: str = "/media"):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Optional[Path]:
+        p = (self.root / key).resolve()
+        return p if p.is_relative_to(self.root) else None
+
+    def _put(self, key: str, data: bytes) -> None:
+        p = self.path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, p)  # readers never see a half-written file
+
+    async def put(self, key: str, data: bytes, content_type: str) -> None:
+        await asyncio.to_thread(self._put, key, data)
+
+    async def exists(self, key: str) -> bool:
+        p = self.path(key)
+        return p is not None and await asyncio.to_thread(p.is_file)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        p = self.path(key)
+        if p is None:
+            return None
+        try:
+            return await asyncio.to_thread(p.read_bytes)
+        except FileNotFoundError:
+            return None
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+_MISSING_CODES = {"NoSuchKey", "NotFound", "404", "AccessDenied", "403"}
+
+class S3Storage:
+    """S3-compatible bucket (AWS, MinIO, R2...) via boto3; objects are public-read behind `base_url`."""
+
+    def __init__(self, bucket: str, base_url: str, endpoint_url: Optional[str] = None, prefix: str = ""):
+        import boto3  # only needed for this backend
+        from botocore.exceptions import ClientError
+
+        self.bucket = bucket
+        self.base_url = base_url.rstrip("/")
+        self.prefix = prefix.strip("/")
+        self._s3 = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self._client_error = ClientError
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    async def put(self, key: str, data: bytes, content_type: str) -> None:
+        await asyncio.to_thread(
+            self._s3.put_object, Bucket=self.bucket, Key=self._key(key), Body=data,
+            ContentType=content_type, CacheControl="public, max-age=31536000, immutable",
+        )
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self._s3.head_object, Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self._s3.exceptions.ClientError:
+            return False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            obj = await asyncio.to_thread(self._s3.get_object, Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            # without s3:ListBucket a missing object is 403 AccessDenied rather than 404 NoSuchKey
+            if e.response.get("Error", {}).get("Code") in _MISSING_CODES:
+                return None
+            raise
+        return await asyncio.to_thread(obj["Body"].read)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{self._key(key)}"
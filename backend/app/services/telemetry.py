@@ -0,0 +1,263 @@
+# backend/app/services/telemetry.py
+import asyncio
+import hashlib
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+# Prometheus text exposition (0.0.4) without the client library: a few histograms and
+# counters in process memory, rendered on GET /metrics. Each request gets a
+# [pool wait, query time] accumulator through a contextvar, filled by InstrumentedPool
+# and TimedConnection, so a route's latency splits into pool wait, Postgres and the
+# rest (handler + serialization).
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STREAM_BUCKETS = (1.0, 10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0, 21600.0)
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_request: ContextVar[Optional[List[float]]] = ContextVar("foody_request_timing", default=None)
+
+def _esc(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(v: float) -> str:
+    return repr(float(v)) if v != float("inf") else "+Inf"
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels: Any, n: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + n
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} counter")
+        for lv, v in self._values.items():
+            out.append(f"{self.name}{_labels(self.labels, lv)} {_num(v)}")
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, List[float]] = {}  # labels -> per-bucket counts, then sum, count
+
+    def observe(self, value: float, *labels: Any) -> None:
+        s = self._series.get(labels)
+        if s is None:
+            s = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        i = bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            s[i] += 1
+        s[-2] += value
+        s[-1] += 1
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} histogram")
+        for lv, s in self._series.items():
+            acc = 0.0
+            for b, c in zip(self.buckets, s):
+                acc += c
+                le = 'le="%s"' % _num(b)
+                out.append(f"{self.name}_bucket{_labels(self.labels, lv, le)} {_num(acc)}")
+            inf = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_labels(self.labels, lv, inf)} {_num(s[-1])}")
+            out.append(f"{self.name}_sum{_labels(self.labels, lv)} {_num(s[-2])}")
+            out.append(f"{self.name}_count{_labels(self.labels, lv)} {_num(s[-1])}")
+
+_WS = re.compile(r"\s+")
+_STR = re.compile(r"'(?:[^']|'')*'")
+_NUM = re.compile(r"(?<![\w$.])\d+(?:\.\d+)?\b")
+_SELECT_LIST = re.compile(r"^SELECT (.+?) FROM ", re.I)
+
+@lru_cache(maxsize=4096)
+def normalize_sql(sql: str, width: int = 160) -> str:
+    """
+    Query shape label: whitespace collapsed, literals as ?, a leading select list as …,
+    cut to `width` chars ($n params stay). Shortened labels end in a hash of the full
+    shape, so two statements never share one.
+    """
+    full = _NUM.sub("?", _STR.sub("?", _WS.sub(" ", sql).strip()))
+    s = _SELECT_LIST.sub("SELECT … FROM ", full, count=1)
+    if len(s) > width:
+        s = s[:width] + "…"
+    if s != full:
+        s += " #" + hashlib.blake2b(full.encode(), digest_size=4).hexdigest()
+    return s
+
+class TimedConnection:
+    """asyncpg connection proxy timing fetch*/execute* by query shape; everything else passes through."""
+
+    __slots__ = ("_conn", "_t", "_pool")
+
+    def __init__(self, conn, telemetry: "Telemetry", pool: str = "primary"):
+        self._conn = conn
+        self._t = telemetry
+        self._pool = pool
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    async def fetch(self, sql: str, *args, **kw):
+        return await self._t.timed(self._conn.fetch, sql, args, kw, self._pool)
+
+    async def fetchrow(self, sql: str, *args, **kw):
+        return await self._t.timed(self._conn.fetchrow, sql, args, kw, self._pool)
+
+    async def fetchval(self, sql: str, *args, **kw):
+        return await self._t.timed(self._conn.fetchval, sql, args, kw, self._pool)
+
+    async def execute(self, sql: str, *args, **kw):
+        return await self._t.timed(self._conn.execute, sql, args, kw, self._pool)
+
+    async def executemany(self, sql: str, *args, **kw):
+        return await self._t.timed(self._conn.executemany, sql, args, kw, self._pool)
+
+def route_of(scope: Dict[str, Any]) -> str:
+    """Path template of the matched route (low-cardinality label), or "<unmatched>"."""
+    route = scope.get("route")
+    if route is None and "app" in scope:
+        # starlette before 0.41 doesn't put the route in the scope
+        for r in getattr(scope["app"], "routes", ()):
+            if r.matches(scope)[0] == Match.FULL:
+                route = r
+                break
+    return getattr(route, "path", None) or "<unmatched>"
+
+class Telemetry:
+    def __init__(self, max_shapes: int = 500):
+        self.requests = Counter("foody_http_requests_total", "HTTP responses by route and status.", ("method", "route", "status"))
+        self.latency = Histogram("foody_http_request_duration_seconds", "Request latency (to the last body chunk).", ("method", "route"))
+        self.stream_duration = Histogram("foody_http_stream_duration_seconds", "How long long-lived (SSE) connections stayed open.",
+                                         ("route",), STREAM_BUCKETS)
+        self.request_db = Histogram("foody_http_request_db_seconds", "Time a request spent in queries.", ("route",))
+        self.request_wait = Histogram("foody_http_request_pool_wait_seconds", "Time a request waited for pool connections.", ("route",))
+        self.queries = Histogram("foody_db_query_duration_seconds", "Query round trip by normalized SQL.", ("query",))
+        self.query_errors = Counter("foody_db_query_errors_total", "Queries that raised, by normalized SQL.", ("query",))
+        self.acquire_wait = Histogram("foody_db_pool_acquire_wait_seconds", "Wait for a pool connection.", ("pool",))
+        self.loop_lag = Histogram("foody_event_loop_lag_seconds", "How late the event loop woke a periodic timer.", (), LAG_BUCKETS)
+        self.pools: Dict[str, Any] = {}  # name -> InstrumentedPool, gauges read from stats()
+        self.max_shapes = int(max_shapes)
+        self._shapes: set = set()
+        self.loop_lag_max = 0.0
+        self.slow = None  # app.services.slow_queries.SlowQueryLog, fed every timed query
+
+    def connection(self, conn, pool: str = "primary") -> TimedConnection:
+        return TimedConnection(conn, self, pool)
+
+    def _shape(self, sql: str) -> str:
+        s = normalize_sql(sql)
+        if s not in self._shapes:
+            if len(self._shapes) >= self.max_shapes:
+                return "<other>"
+            self._shapes.add(s)
+        return s
+
+    def observe_acquire(self, pool: str, seconds: float) -> None:
+        self.acquire_wait.observe(seconds, pool)
+        acc = _request.get()
+        if acc is not None:
+            acc[0] += seconds
+
+    async def timed(self, fn, sql: str, args, kw, pool: str = "primary"):
+        t0 = time.perf_counter()
+        try:
+            return await fn(sql, *args, **kw)
+        except Exception:
+            self.query_errors.inc(self._shape(sql))
+            raise
+        finally:
+            dt = time.perf_counter() - t0
+            self.queries.observe(dt, self._shape(sql))
+            acc = _request.get()
+            if acc is not None:
+                acc[1] += dt
+            if self.slow is not None:
+                self.slow.observe(sql, args, dt, pool)
+
+    async def watch_loop(self, interval: float = 0.5) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - t0 - interval)
+            self.loop_lag.observe(lag)
+            self.loop_lag_max = max(self.loop_lag_max, lag)
+
+    def render(self) -> bytes:
+        out: List[str] = []
+        for m in (self.requests, self.latency, self.stream_duration, self.request_db, self.request_wait,
+                  self.queries, self.query_errors, self.acquire_wait, self.loop_lag):
+            m.render(out)
+        out.append("# HELP foody_event_loop_lag_max_seconds Largest event loop lag seen.")
+        out.append("# TYPE foody_event_loop_lag_max_seconds gauge")
+        out.append(f"foody_event_loop_lag_max_seconds {_num(self.loop_lag_max)}")
+        out.append("# HELP foody_db_pool_connections Pool connections by state.")
+        out.append("# TYPE foody_db_pool_connections gauge")
+        stats = {name: p.stats() for name, p in self.pools.items() if p is not None}
+        for name, st in stats.items():
+            for state, key in (("size", "size"), ("idle", "idle"), ("in_use", "in_use"), ("max", "max_size")):
+                out.append(f'foody_db_pool_connections{{pool="{_esc(name)}",state="{state}"}} {_num(st[key])}')
+        out.append("# HELP foody_db_pool_waiting Callers queued for a connection.")
+        out.append("# TYPE foody_db_pool_waiting gauge")
+        for name, st in stats.items():
+            out.append(f'foody_db_pool_waiting{{pool="{_esc(name)}"}} {_num(st["waiting"])}')
+        out.append("# HELP foody_db_pool_acquire_timeouts_total Acquires that gave up (503).")
+        out.append("# TYPE foody_db_pool_acquire_timeouts_total counter")
+        for name, st in stats.items():
+            out.append(f'foody_db_pool_acquire_timeouts_total{{pool="{_esc(name)}"}} {_num(st["timeouts"])}')
+        return ("\n".join(out) + "\n").encode()
+
+class TelemetryMiddleware:
+    """
+    Pure ASGI; records every HTTP request except `skip` paths (the scrape itself).
+    `streams` paths (SSE) stay open for minutes, so their time goes to a separate
+    connection-duration histogram instead of the request latency ones.
+    """
+
+    def __init__(self, app, telemetry: Telemetry, skip: Sequence[str] = ("/metrics",), streams: Sequence[str] = ()):
+        self.app = app
+        self.telemetry = telemetry
+        self.skip = tuple(skip)
+        self.streams = tuple(streams)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip:
+            return await self.app(scope, receive, send)
+        acc = [0.0, 0.0]
+        token = _request.set(acc)
+        status = [500]
+
+        async def send_status(msg):
+            if msg["type"] == "http.response.start":
+                status[0] = msg["status"]
+            await send(msg)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            dt = time.perf_counter() - t0
+            _request.reset(token)
+            t = self.telemetry
+            route = route_of(scope)
+            t.requests.inc(scope["method"], route, status[0])
+            if scope["path"] in self.streams:
+                t.stream_duration.observe(dt, route)
+            else:
+                t.latency.observe(dt, scope["method"], route)
+                t.request_db.observe(acc[1], route)
+                t.request_wait.observe(acc[0], route)
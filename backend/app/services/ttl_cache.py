@@ -0,0 +1,41 @@
+# backend/app/services/ttl_cache.py
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """
+    Small per-process cache whose keys are (scope, ...) tuples, so everything cached
+    for one scope (e.g. a restaurant) can be dropped at once.
+    """
+
+    def __init__(self, ttl: float = 10.0, maxsize: int = 2048):
+        self.ttl = float(ttl)
+        self.maxsize = int(maxsize)
+        self._data: Dict[Tuple[Hashable, ...], Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        hit = self._data.get(key)
+        if hit is None or hit[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return hit[1]
+
+    def put(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        if len(self._data) >= self.maxsize:
+            now = time.monotonic()
+            self._data = {k: v for k, v in self._data.items() if v[0] >= now}
+            if len(self._data) >= self.maxsize:
+                self._data.clear()
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, scope: Hashable) -> None:
+        for k in [k for k in self._data if k[0] == scope]:
+            del self._data[k]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._data), "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
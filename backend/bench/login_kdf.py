@@ -0,0 +1,72 @@
+"""
+Login KDF benchmark: verification throughput and event-loop lag under concurrent logins.
+
+    python bench/login_kdf.py --logins 200 --concurrency 50
+
+Runs the same burst twice — scrypt verified inline on the loop, then through
+PasswordHasher's bounded thread pool — while a ticker measures how late the loop
+wakes up (the delay every other request would see).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.passwords import PasswordHasher  # noqa: E402
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))] if xs else 0.0
+
+async def _ticker(stop: asyncio.Event, lags: list, period: float = 0.005):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(period)
+        lags.append((loop.time() - t0 - period) * 1000.0)
+
+async def _burst(hasher: PasswordHasher, stored: str, logins: int, concurrency: int, inline: bool):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            if inline:
+                ok, _ = hasher.verify_sync("correct horse", stored)
+                await asyncio.sleep(0)
+            else:
+                ok, _ = await hasher.verify("correct horse", stored)
+            assert ok
+
+    stop, lags = asyncio.Event(), []
+    tick = asyncio.create_task(_ticker(stop, lags))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    wall = time.perf_counter() - t0
+    stop.set()
+    await tick
+    mode = "inline" if inline else f"pool({hasher.workers})"
+    print(
+        f"{mode:>9}: {logins / wall:7.1f} logins/s  loop lag p50={_pct(lags, 50):6.1f}ms "
+        f"p99={_pct(lags, 99):6.1f}ms max={max(lags or [0]):6.1f}ms  ticks={len(lags)}"
+    )
+
+async def main(args):
+    hasher = PasswordHasher(n=args.n, r=args.r, p=args.p, workers=args.workers)
+    stored = hasher.hash_sync("correct horse")
+    print(f"scrypt n={args.n} r={args.r} p={args.p}; {args.logins} logins, concurrency {args.concurrency}")
+    await _burst(hasher, stored, args.logins, args.concurrency, inline=True)
+    await _burst(hasher, stored, args.logins, args.concurrency, inline=False)
+    hasher.close()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--logins", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--workers", type=int, default=int(os.getenv("PASSWORD_HASH_WORKERS", "2")))
+    ap.add_argument("--n", type=int, default=2 ** 14)
+    ap.add_argument("--r", type=int, default=8)
+    ap.add_argument("--p", type=int, default=1)
+    asyncio.run(main(ap.parse_args()))
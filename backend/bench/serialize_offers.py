@@ -0,0 +1,89 @@
+"""
+Offer serialization benchmark: rows -> JSON bytes for a 200-offer page.
+
+    python bench/serialize_offers.py --rows 200 --rounds 500
+
+Compares, per endpoint shape, the previous path (raw cents columns, per-row price /
+discount math and isoformat() in Python, then jsonable_encoder + stdlib json as
+FastAPI's default response does) with the current one (columns already shaped by
+offer_queries.OFFER_COLUMNS, dict(row), fast_json.dumps). Rows are plain dicts standing
+in for asyncpg Records, so this measures the Python side only, not the query.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.services import fast_json  # noqa: E402
+from main import _serialize_offer, _serialize_offer_raw  # noqa: E402
+
+def _rows(n: int, seed: int = 1):
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    raw, shaped = [], []
+    for i in range(n):
+        pc = rnd.randrange(5000, 90000, 10)
+        oc = pc * 2 if i % 3 else None
+        photo = (f"/media/img/ab/cd/{'%064x' % rnd.getrandbits(256)}/full.jpg" if i % 2
+                 else f"https://cdn.example.com/p/{i}.jpg")
+        base = {
+            "id": 1000 + i, "restaurant_id": 1 + i % 7, "title": f"Набор выпечки #{i}",
+            "qty_total": 10, "qty_left": rnd.randint(1, 10), "status": "active",
+            "expires_at": now + timedelta(hours=rnd.randint(1, 12)), "image_url": photo,
+            "category": "bakery", "description": "Круассаны, булочки и хлеб дня",
+            "created_at": now - timedelta(hours=3), "updated_at": now - timedelta(hours=1),
+        }
+        raw.append(dict(base, price_cents=pc, original_price_cents=oc))
+        shaped.append(dict(
+            base, price=pc / 100.0, original_price=(oc / 100.0 if oc else None),
+            discount_percent=(int(round((1 - pc / oc) * 100)) if oc else None), photo_url=photo,
+        ))
+    return raw, shaped
+
+def _stdlib_response(content) -> bytes:
+    # fastapi.responses.JSONResponse.render after jsonable_encoder
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+def _stdlib_feed(items) -> bytes:
+    # PublicFeed's previous encoder
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def _time(fn, rounds: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / rounds
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200)
+    ap.add_argument("--rounds", type=int, default=500)
+    args = ap.parse_args()
+    raw, shaped = _rows(args.rows)
+
+    old_list = lambda: _stdlib_response({"items": [_serialize_offer_raw(dict(r)) for r in raw], "page": 1, "limit": args.rows})
+    new_list = lambda: fast_json.dumps({"items": [_serialize_offer(r) for r in shaped], "page": 1, "limit": args.rows})
+    old_feed = lambda: _stdlib_feed([_serialize_offer_raw(dict(r)) for r in raw])
+    new_feed = lambda: fast_json.dumps([_serialize_offer(r) for r in shaped])
+
+    if json.loads(old_list()) != json.loads(new_list()):
+        sys.exit("list_offers: old and new bodies differ")
+    if json.loads(old_feed()) != json.loads(new_feed()):
+        sys.exit("public_offers: old and new bodies differ")
+
+    print(f"rows={args.rows} rounds={args.rounds} encoder={'orjson' if fast_json.orjson else 'stdlib json'}")
+    for name, old, new in (("list_offers", old_list, new_list), ("public_offers", old_feed, new_feed)):
+        a, b = _time(old, args.rounds), _time(new, args.rounds)
+        print(f"  {name:<14} before {a:7.3f} ms   after {b:7.3f} ms   x{a / b:.1f}   ({len(new())} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import os, asyncio, asyncpg
 
+from app.services.migrations import Migration, migrate
+
 DB_URL = os.getenv("DATABASE_URL")
 
 async def _ensure(conn: asyncpg.Connection):
@@ -147,10 +149,16 @@ async def _ensure(conn: asyncpg.Connection):
         END $$;
     """)
 
+# Versioned so repeated boots skip the DDL (schema_version, component "bootstrap").
+MIGRATIONS = [
+    Migration(1, "foody_tables", _ensure),
+]
+
 async def run():
     conn = await asyncpg.connect(DB_URL)
     try:
-        await _ensure(conn)
+        r = await migrate(conn, "bootstrap", MIGRATIONS)
+        print(f"BOOTSTRAP: v{r['from']} -> v{r['to']} ({len(r['applied'])} applied) in {r['ms']}ms")
     finally:
         await conn.close()
 
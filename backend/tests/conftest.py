@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# the app imports as `app.services...` from backend/ (same as main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
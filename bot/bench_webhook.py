@@ -0,0 +1,134 @@
+"""
+Webhook load harness: replays Telegram updates and measures ack latency and handler throughput.
+
+    python bench_webhook.py --url http://localhost:8080 --secret foodySecret123 --file updates.jsonl
+    python bench_webhook.py --inprocess --synthetic 2000 --handler-ms 50 --workers 8
+
+Updates come from a JSONL file (record real traffic with BOT_RECORD_UPDATES=path on the
+bot) or are synthesized as /start messages across --chats chats; --dup-rate re-sends a
+share of them to exercise update_id dedupe.
+
+--url posts them to a running bot (needs httpx) and then polls /health until the update
+queue is drained. Note the bot's handlers really answer through the Bot API, so use a
+test bot / recorded updates from your own chats. --inprocess needs neither Telegram nor
+aiogram: each handler sleeps --handler-ms, and the same burst is run with the handler
+awaited inside the request (the old webhook) and through UpdateQueue.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from update_queue import UpdateQueue  # noqa: E402
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))] if xs else 0.0
+
+def _load(args):
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            ups = [json.loads(line) for line in f if line.strip()]
+    else:
+        ups = []
+        for i in range(args.synthetic):
+            chat = 100000 + i % args.chats
+            ups.append({"update_id": 900000000 + i, "message": {
+                "message_id": i + 1, "date": int(time.time()), "text": "/start",
+                "chat": {"id": chat, "type": "private"}, "from": {"id": chat, "is_bot": False, "first_name": "Load"},
+                "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+            }})
+    rnd = random.Random(1)
+    dups = [u for u in ups if rnd.random() < args.dup_rate]
+    return ups + dups
+
+async def _burst(send, updates, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    lat, codes = [], {}
+
+    async def one(u):
+        async with sem:
+            t0 = time.perf_counter()
+            code = await send(u)
+            lat.append((time.perf_counter() - t0) * 1000.0)
+            codes[code] = codes.get(code, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(u) for u in updates))
+    return time.perf_counter() - t0, lat, codes
+
+def _report(name, wall, lat, codes, n):
+    print(f"  {name:<8} sent {n} in {wall:6.2f}s ({n / wall:7.1f}/s)  ack p50 {_pct(lat, 50):7.2f} ms"
+          f"  p99 {_pct(lat, 99):7.2f} ms  status {codes}")
+
+async def _inprocess(args, updates):
+    async def handler(_):
+        await asyncio.sleep(args.handler_ms / 1000.0)
+
+    async def inline(u):
+        await handler(u)
+        return 200
+    wall, lat, codes = await _burst(inline, updates, args.concurrency)
+    _report("inline", wall, lat, codes, len(updates))
+
+    q = UpdateQueue(handler, workers=args.workers, maxsize=args.queue_size)
+    q.start()
+
+    async def queued(u):
+        return 200 if q.submit(u) else 503
+    wall, lat, codes = await _burst(queued, updates, args.concurrency)
+    t0 = time.perf_counter()
+    await q.close(drain_seconds=3600)
+    _report("queued", wall, lat, codes, len(updates))
+    print(f"  drained in {time.perf_counter() - t0 + wall:.2f}s  {q.stats()}")
+
+async def _live(args, updates):
+    import httpx
+
+    headers = {"X-Telegram-Bot-Api-Secret-Token": args.secret}
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as http:
+        before = (await http.get("/health")).json().get("updates") or {}
+
+        async def post(u):
+            return (await http.post("/tg/webhook", json=u, headers=headers)).status_code
+        wall, lat, codes = await _burst(post, updates, args.concurrency)
+        _report("webhook", wall, lat, codes, len(updates))
+
+        t0 = time.perf_counter()
+        while True:
+            st = (await http.get("/health")).json().get("updates") or {}
+            if not st.get("depth"):
+                break
+            await asyncio.sleep(0.2)
+        done = (st.get("processed", 0) + st.get("failed", 0)) - (before.get("processed", 0) + before.get("failed", 0))
+        total = wall + time.perf_counter() - t0
+        print(f"  handled {done} in {total:.2f}s ({done / total:.1f}/s)  {st}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="")
+    ap.add_argument("--secret", default=os.getenv("WEBHOOK_SECRET", "foodySecret123"))
+    ap.add_argument("--file", default="")
+    ap.add_argument("--synthetic", type=int, default=1000)
+    ap.add_argument("--chats", type=int, default=200)
+    ap.add_argument("--dup-rate", type=float, default=0.05)
+    ap.add_argument("--concurrency", type=int, default=40)  # Telegram's default max_connections
+    ap.add_argument("--inprocess", action="store_true")
+    ap.add_argument("--handler-ms", type=float, default=50.0)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--queue-size", type=int, default=100000)
+    args = ap.parse_args()
+    updates = _load(args)
+    print(f"updates={len(updates)} concurrency={args.concurrency}")
+    if args.inprocess or not args.url:
+        asyncio.run(_inprocess(args, updates))
+    else:
+        asyncio.run(_live(args, updates))
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
-import os
-from fastapi import FastAPI, Request, HTTPException
+import os, hmac, json
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException, Response
 from aiogram import Bot, Dispatcher
 from aiogram.enums.parse_mode import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from aiogram.types import Update, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
-from aiogram.filters import CommandStart
+from aiogram import F
+from aiogram.types import (Update, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo,
+                           KeyboardButton, ReplyKeyboardMarkup, ReplyKeyboardRemove)
+from aiogram.filters import Command, CommandStart
+
+from update_queue import UpdateQueue, UpdateRecorder
+from notifier import FoodyAPI, Notifier, Sender
 
 BOT_TOKEN = os.getenv("BOT_TOKEN","")
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET","foodySecret123")
 WEBAPP_PUBLIC = os.getenv("WEBAPP_PUBLIC","https://example.com").rstrip("/")
 WEBAPP_BUYER_URL = os.getenv("WEBAPP_BUYER_URL", f"{WEBAPP_PUBLIC}/web/buyer/")
 WEBAPP_MERCHANT_URL = os.getenv("WEBAPP_MERCHANT_URL", f"{WEBAPP_PUBLIC}/web/merchant/")
+BOT_WEBHOOK_URL = os.getenv("BOT_WEBHOOK_URL","").rstrip("/")  # set -> setWebhook on startup
+BOT_WORKERS = int(os.getenv("BOT_WORKERS","8"))
+BOT_QUEUE_SIZE = int(os.getenv("BOT_QUEUE_SIZE","1000"))
+BOT_DRAIN_SECONDS = float(os.getenv("BOT_DRAIN_SECONDS","10"))
+BOT_RECORD_UPDATES = os.getenv("BOT_RECORD_UPDATES","")  # path: append raw updates (JSONL) for bench_webhook.py
+FOODY_API = os.getenv("FOODY_API","").rstrip("/")
+BOT_API_SECRET = os.getenv("BOT_API_SECRET","")  # same value as the backend's; enables subscriptions
+NOTIFY_RATE = float(os.getenv("NOTIFY_RATE","25"))  # messages/s across all chats
+NOTIFY_RADIUS_KM = float(os.getenv("NOTIFY_RADIUS_KM","3"))
 
 def _https(u:str)->str:
     u = (u or "").strip()
@@ -23,10 +38,36 @@ WEBAPP_MERCHANT_URL = _https(WEBAPP_MERCHANT_URL)
 
 bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 dp = Dispatcher()
-app = FastAPI()
+
+async def _process(data: dict):
+    await dp.feed_update(bot, Update.model_validate(data, context={"bot": bot}))
+
+updates = UpdateQueue(_process, workers=BOT_WORKERS, maxsize=BOT_QUEUE_SIZE)
+recorder = UpdateRecorder(BOT_RECORD_UPDATES, maxsize=BOT_QUEUE_SIZE) if BOT_RECORD_UPDATES else None
+api = FoodyAPI(FOODY_API, BOT_API_SECRET) if FOODY_API and BOT_API_SECRET else None
+notifier = Notifier(api, Sender(bot, rate=NOTIFY_RATE), WEBAPP_BUYER_URL) if api else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    updates.start()
+    if recorder: recorder.start()
+    if notifier: notifier.start()
+    if BOT_WEBHOOK_URL:
+        await bot.set_webhook(f"{BOT_WEBHOOK_URL}/tg/webhook", secret_token=WEBHOOK_SECRET,
+                              max_connections=40, allowed_updates=dp.resolve_used_update_types())
+    try:
+        yield
+    finally:
+        await updates.close(BOT_DRAIN_SECONDS)
+        if recorder: await recorder.close()
+        if notifier: await notifier.close()
+        await bot.session.close()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/health")
-async def health(): return {"ok": True}
+async def health(): return {"ok": True, "updates": updates.stats(), "notify": notifier.stats() if notifier else None,
+                            "recorder": recorder.stats() if recorder else None}
 
 def main_kb():
     return InlineKeyboardMarkup(inline_keyboard=[[
@@ -39,6 +80,10 @@ async def on_start(m):
     payload = None
     if m.text and " " in m.text:
         payload = m.text.split(" ",1)[1].strip()
+    if payload in ("buyer", "merchant"):
+        await m.answer("Открыть витрину:" if payload == "buyer" else "Открыть ЛК ресторана:", reply_markup=main_kb()); return
+    if payload and payload.startswith("sub_") and payload[4:].isdigit():
+        await _subscribe_restaurant(m, int(payload[4:])); return
     if payload and payload.startswith("offer_"):
         offer_id = payload.split("offer_",1)[1]
         kb = InlineKeyboardMarkup(inline_keyboard=[[
@@ -47,11 +92,62 @@ async def on_start(m):
         await m.answer("Вот предложение 👇", reply_markup=kb); return
     await m.answer("Привет! Я помогу спасти еду 💚\nВыбери раздел:", reply_markup=main_kb())
 
+@dp.message(Command("app"))
+async def on_app(m):
+    await m.answer("Выбери раздел:", reply_markup=main_kb())
+
+# ---- subscriptions: /start sub_<restaurant_id>, /near + location, /subs, /unsub [id] ----
+async def _subscribe_restaurant(m, rid: int):
+    if not api:
+        await m.answer("Подписки пока недоступны."); return
+    try:
+        await api.subscribe(m.chat.id, restaurant_id=rid)
+    except RuntimeError:
+        await m.answer("Не нашёл такой ресторан 🤔"); return
+    await m.answer("🔔 Готово! Пришлю, когда в этом ресторане появятся новые предложения.\nОтписаться: /unsub " + str(rid))
+
+@dp.message(Command("near"))
+async def on_near(m):
+    kb = ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="📍 Отправить геопозицию", request_location=True)]],
+                             resize_keyboard=True, one_time_keyboard=True)
+    await m.answer(f"Пришли геопозицию — буду сообщать о новых предложениях в радиусе {NOTIFY_RADIUS_KM:g} км.", reply_markup=kb)
+
+@dp.message(F.location)
+async def on_location(m):
+    if not api:
+        await m.answer("Подписки пока недоступны.", reply_markup=ReplyKeyboardRemove()); return
+    r = await api.subscribe(m.chat.id, lat=m.location.latitude, lng=m.location.longitude, radius_km=NOTIFY_RADIUS_KM)
+    await m.answer(f"🔔 Подписка на район оформлена: {r['radius_km']:g} км вокруг точки.\nОтписаться: /unsub",
+                   reply_markup=ReplyKeyboardRemove())
+
+@dp.message(Command("subs"))
+async def on_subs(m):
+    items = await api.subscriptions(m.chat.id) if api else []
+    if not items:
+        await m.answer("Подписок нет. /near — новые предложения рядом."); return
+    lines = [f"📍 район, {s['radius_km']:g} км" if s["restaurant_id"] is None
+             else f"🏪 {s['restaurant_name'] or s['restaurant_id']} — /unsub {s['restaurant_id']}" for s in items]
+    await m.answer("Твои подписки:\n" + "\n".join(lines) + "\n\n/unsub — отписаться от всего")
+
+@dp.message(Command("unsub"))
+async def on_unsub(m):
+    arg = m.text.split(" ",1)[1].strip() if m.text and " " in m.text else ""
+    n = await api.unsubscribe(m.chat.id, int(arg) if arg.isdigit() else None) if api else 0
+    await m.answer("Подписка отменена." if n else "Подписок не было.")
+
 @app.post("/tg/webhook")
 async def tg_webhook(request: Request):
-    if request.headers.get("x-telegram-bot-api-secret-token") != WEBHOOK_SECRET:
+    # ack right away: handlers run on the update queue, never inside Telegram's request
+    if not hmac.compare_digest(request.headers.get("x-telegram-bot-api-secret-token") or "", WEBHOOK_SECRET):
         raise HTTPException(401, "bad secret")
-    data = await request.json()
-    upd = Update.model_validate(data)
-    await dp.feed_update(bot, upd)
+    try:
+        data = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(400, "bad json")
+    if not isinstance(data, dict):
+        raise HTTPException(400, "bad update")
+    if recorder:
+        recorder.record(data)
+    if not updates.submit(data):
+        return Response(status_code=503, headers={"Retry-After": "1"})  # Telegram retries later
     return "OK"
@@ -0,0 +1,219 @@
+import asyncio
+import html
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
+
+log = logging.getLogger("foody.bot.notify")
+
+class FoodyAPI:
+    """Bot-only backend endpoints (/api/v1/bot/...), authorized by BOT_API_SECRET."""
+
+    def __init__(self, base_url: str, secret: str):
+        self.base_url = base_url.rstrip("/")
+        self.secret = secret
+        self._http: Optional[aiohttp.ClientSession] = None
+
+    async def _call(self, method: str, path: str, **kw) -> Any:
+        if self._http is None:
+            self._http = aiohttp.ClientSession(headers={"X-Foody-Bot-Secret": self.secret},
+                                               timeout=aiohttp.ClientTimeout(total=30))
+        async with self._http.request(method, self.base_url + path, **kw) as r:
+            data = await r.json(content_type=None)
+            if r.status >= 400:
+                raise RuntimeError(f"{method} {path}: {r.status} {data}")
+            return data
+
+    async def subscribe(self, chat_id: int, **target) -> Dict[str, Any]:
+        return await self._call("POST", "/api/v1/bot/subscriptions", json=dict(target, chat_id=chat_id))
+
+    async def subscriptions(self, chat_id: int) -> List[Dict[str, Any]]:
+        return (await self._call("GET", "/api/v1/bot/subscriptions", params={"chat_id": chat_id}))["items"]
+
+    async def unsubscribe(self, chat_id: int, restaurant_id: Optional[int] = None) -> int:
+        params = {"chat_id": chat_id}
+        if restaurant_id is not None:
+            params["restaurant_id"] = restaurant_id
+        return (await self._call("DELETE", "/api/v1/bot/subscriptions", params=params))["removed"]
+
+    async def claim(self, limit: int) -> List[Dict[str, Any]]:
+        return (await self._call("POST", "/api/v1/bot/events/claim", params={"limit": limit}))["events"]
+
+    async def recipients(self, event_ids: List[int], after_chat: Optional[int], limit: int) -> Dict[str, Any]:
+        return await self._call("POST", "/api/v1/bot/events/recipients",
+                                json={"event_ids": event_ids, "after_chat": after_chat, "limit": limit})
+
+    async def done(self, event_ids: List[int], blocked_chat_ids: List[int]) -> None:
+        await self._call("POST", "/api/v1/bot/events/done",
+                         json={"event_ids": event_ids, "blocked_chat_ids": blocked_chat_ids})
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+class Sender:
+    """
+    sendMessage under Telegram's limits: a global token bucket (`rate`/s; ~30/s is the
+    Bot API broadcast ceiling), at most one message per chat per `chat_interval` seconds,
+    `concurrency` requests in flight so network latency doesn't cap the rate. A 429
+    (RetryAfter) pauses every send for the advised time, then the message is retried.
+    """
+
+    def __init__(self, bot: Bot, rate: float = 25.0, chat_interval: float = 1.0, concurrency: int = 16):
+        self.bot = bot
+        self.rate = float(rate)
+        self.chat_interval = float(chat_interval)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tokens = self.rate
+        self._ts = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self._last: Dict[int, float] = {}
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.blocked: List[int] = []
+
+    async def _token(self, chat_id: int) -> None:
+        # per-chat spacing first, outside the lock, so one chat never holds up the others
+        wait = self._last.get(chat_id, 0.0) + self.chat_interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                self._tokens = min(self.rate, self._tokens + (now - self._ts) * self.rate)
+                self._ts = now
+                if wait <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._last[chat_id] = now
+                    if len(self._last) > 100_000:
+                        self._last = {c: t for c, t in self._last.items() if t > now - self.chat_interval}
+                    return
+                await asyncio.sleep(max(wait, (1 - self._tokens) / self.rate))
+
+    async def send(self, chat_id: int, text: str, markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        async with self._slots:
+            for _ in range(3):
+                await self._token(chat_id)
+                try:
+                    await self.bot.send_message(chat_id, text, reply_markup=markup, disable_web_page_preview=True)
+                    self.sent += 1
+                    return
+                except TelegramRetryAfter as e:
+                    self.retried += 1
+                    self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                except TelegramForbiddenError:
+                    self.blocked.append(chat_id)  # blocked the bot / deactivated: unsubscribe
+                    return
+                except TelegramBadRequest as e:
+                    self.failed += 1
+                    if "chat not found" in str(e).lower():
+                        self.blocked.append(chat_id)
+                    return
+                except Exception:
+                    self.failed += 1
+                    log.exception("send to %s failed", chat_id)
+                    return
+            self.failed += 1
+
+def _price(v) -> str:
+    if v is None:
+        return "—"
+    return f"{v:.0f}" if float(v).is_integer() else f"{v:.2f}"
+
+def compose(offers: List[Dict[str, Any]], buyer_url: str) -> Tuple[str, InlineKeyboardMarkup]:
+    """One message for every offer a chat should hear about in this batch (up to 5 listed)."""
+    lines = []
+    for ev in offers[:5]:
+        o, rest = ev["offer"], ev.get("restaurant") or {}
+        head = "🆕" if ev["kind"] == "new" else "🔁"
+        disc = f" (−{o['discount_percent']}%)" if o.get("discount_percent") else ""
+        lines.append(f"{head} <b>{html.escape(o['title'] or 'Предложение')}</b> — {_price(o['price'])} ₽{disc}\n"
+                     f"📍 {html.escape(rest.get('name') or '')}{', ' + html.escape(rest['address']) if rest.get('address') else ''}")
+    if len(offers) > 5:
+        lines.append(f"…и ещё {len(offers) - 5}")
+    buttons = [[InlineKeyboardButton(text=f"Открыть: {(ev['offer']['title'] or 'предложение')[:40]}",
+                                     web_app=WebAppInfo(url=f"{buyer_url}?offer={ev['offer']['id']}"))]
+               for ev in offers[:3]]
+    return "\n\n".join(lines), InlineKeyboardMarkup(inline_keyboard=buttons)
+
+class Notifier:
+    """
+    Polls the backend outbox: claims a batch of offer events, pages through the matching
+    chats (one message per chat for the whole batch), sends them via `Sender`, then marks
+    the events done and reports chats that blocked the bot. Delivery is at-least-once:
+    a crash mid-batch re-sends it after the backend lease expires.
+    """
+
+    def __init__(self, api: FoodyAPI, sender: Sender, buyer_url: str, batch: int = 20, page: int = 1000,
+                 poll_seconds: float = 3.0):
+        self.api = api
+        self.sender = sender
+        self.buyer_url = buyer_url
+        self.batch = batch
+        self.page = page
+        self.poll_seconds = poll_seconds
+        self.batches = 0
+        self.events = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.api.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                events = await self.api.claim(self.batch)
+                if events:
+                    await self.deliver(events)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("notifier batch failed")
+            await asyncio.sleep(self.poll_seconds)
+
+    async def deliver(self, events: List[Dict[str, Any]]) -> None:
+        by_offer = {ev["offer"]["id"]: ev for ev in events}
+        after = None
+        pending: List[asyncio.Task] = []
+        while True:
+            page = await self.api.recipients([ev["id"] for ev in events], after, self.page)
+            for item in page["items"]:
+                offers = [by_offer[oid] for oid in item["offer_ids"] if oid in by_offer]
+                if offers:
+                    text, markup = compose(offers, self.buyer_url)
+                    pending.append(asyncio.create_task(self.sender.send(item["chat_id"], text, markup)))
+            # the sender's limits set the pace; keep at most about one page queued
+            if len(pending) >= self.page:
+                await asyncio.gather(*pending)
+                pending = []
+            after = page["next"]
+            if after is None:
+                break
+        await asyncio.gather(*pending)
+        blocked, self.sender.blocked = self.sender.blocked, []
+        await self.api.done([ev["id"] for ev in events], blocked)
+        self.batches += 1
+        self.events += len(events)
+
+    def stats(self) -> Dict[str, Any]:
+        s = self.sender
+        return {"batches": self.batches, "events": self.events, "sent": s.sent, "failed": s.failed,
+                "retried": s.retried, "rate": s.rate}
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List
+
+log = logging.getLogger("foody.bot.queue")
+
+Process = Callable[[Dict[str, Any]], Awaitable[None]]
+
+def update_key(data: Dict[str, Any]) -> int:
+    """Chat (or user) an update belongs to; updates with the same key are handled in order."""
+    for k, v in data.items():
+        if k == "update_id" or not isinstance(v, dict):
+            continue
+        chat = v.get("chat") or (v.get("message") or {}).get("chat")
+        if chat and "id" in chat:
+            return int(chat["id"])
+        user = v.get("from") or v.get("user")
+        if user and "id" in user:
+            return int(user["id"])
+    return int(data.get("update_id") or 0)
+
+class UpdateQueue:
+    """
+    Webhook updates are acked as soon as they are queued; `workers` tasks run the
+    handlers. Each worker owns one queue and updates are routed by chat, so one chat's
+    updates keep their order while different chats run in parallel. Recently seen
+    update_ids (Telegram redelivers after timeouts and restarts) are skipped.
+    """
+
+    def __init__(self, process: Process, workers: int = 8, maxsize: int = 1000, dedupe: int = 10000):
+        self.process = process
+        self.workers = max(1, int(workers))
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(max(1, int(maxsize) // self.workers)) for _ in range(self.workers)]
+        self._tasks: List[asyncio.Task] = []
+        self._seen: "OrderedDict[int, None]" = OrderedDict()
+        self._dedupe = int(dedupe)
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_ms = 0.0
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work(q)) for q in self._queues]
+
+    async def close(self, drain_seconds: float = 10.0) -> None:
+        """Let queued updates finish for up to `drain_seconds`, then cancel the workers."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._queues)), drain_seconds)
+        except asyncio.TimeoutError:
+            log.warning("bot queue: %d updates dropped on shutdown", self.depth())
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, data: Dict[str, Any]) -> bool:
+        """False if the update's queue is full (answer non-2xx so Telegram retries later)."""
+        uid = data.get("update_id")
+        if uid is not None and uid in self._seen:
+            self.duplicates += 1
+            return True
+        q = self._queues[update_key(data) % self.workers]
+        try:
+            q.put_nowait(data)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        if uid is not None:
+            self._seen[uid] = None
+            if len(self._seen) > self._dedupe:
+                self._seen.popitem(last=False)
+        self.accepted += 1
+        return True
+
+    async def _work(self, q: asyncio.Queue) -> None:
+        while True:
+            data = await q.get()
+            t0 = time.perf_counter()
+            try:
+                await self.process(data)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                log.exception("bot update %s failed", data.get("update_id"))
+            finally:
+                self.busy_ms += (time.perf_counter() - t0) * 1000.0
+                q.task_done()
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def stats(self) -> Dict[str, Any]:
+        done = self.processed + self.failed
+        return {
+            "workers": self.workers, "depth": self.depth(),
+            "accepted": self.accepted, "duplicates": self.duplicates, "rejected": self.rejected,
+            "processed": self.processed, "failed": self.failed,
+            "avg_handler_ms": round(self.busy_ms / done, 2) if done else None,
+        }
+
+class UpdateRecorder:
+    """
+    Appends raw updates to a JSONL file (for bench_webhook.py) off the request path: the
+    webhook only enqueues the line, one task writes whatever has piled up in a thread.
+    Lines beyond `maxsize` pending are dropped and counted, never waited for.
+    """
+
+    def __init__(self, path: str, maxsize: int = 10000):
+        self.path = path
+        self._q: asyncio.Queue = asyncio.Queue(max(1, int(maxsize)))
+        self._task = None
+        self.written = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._write())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            await self._q.join()
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def record(self, data: Dict[str, Any]) -> None:
+        try:
+            self._q.put_nowait(json.dumps(data, ensure_ascii=False) + "\n")
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def _append(self, lines: List[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    async def _write(self) -> None:
+        while True:
+            lines = [await self._q.get()]
+            while not self._q.empty():
+                lines.append(self._q.get_nowait())
+            try:
+                await asyncio.to_thread(self._append, lines)
+                self.written += len(lines)
+            except OSError:
+                self.dropped += len(lines)
+                log.exception("bot recorder: cannot write %s", self.path)
+            finally:
+                for _ in lines:
+                    self._q.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "written": self.written, "dropped": self.dropped, "pending": self._q.qsize()}
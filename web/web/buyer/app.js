@@ -8,6 +8,7 @@ document.addEventListener("DOMContentLoaded", () => {
   const refreshBtn = document.getElementById("refresh");
   wireModal();
   loadOffers();
+  watchOffers();
   refreshBtn?.addEventListener("click", () => loadOffers({ force: true }));
   q?.addEventListener("input", debounce(() => filterByQuery(), 120));
 });
@@ -120,6 +121,24 @@ async function loadOffers(){
     $("#offers").setAttribute("aria-busy","false");
   }
 }
+// live deltas instead of re-downloading the list
+function watchOffers(){
+  if(typeof EventSource==="undefined") return;
+  const es=new EventSource(`${API}/api/v1/public/offers/stream`);
+  let broken=false;
+  es.addEventListener("error",()=>{ broken=true; });
+  es.addEventListener("open",()=>{ if(broken){ broken=false; loadOffers(); } });
+  es.addEventListener("resync",()=>loadOffers());
+  es.addEventListener("offer",e=>{
+    let d; try{ d=JSON.parse(e.data); }catch{ return; }
+    const id=String(d.op==="upsert" ? d.offer?.id : d.id);
+    const i=lastOffers.findIndex(o=>String(o.id)===id);
+    if(d.op==="upsert"){ if(i>=0) lastOffers[i]=d.offer; else lastOffers.push(d.offer); }
+    else if(i>=0){ lastOffers.splice(i,1); }
+    else return;
+    filterByQuery();
+  });
+}
 function filterByQuery(){
   const q=($("#q")?.value||"").trim().toLowerCase();
   if(!q){ renderOffers(lastOffers); return; }
@@ -53,7 +53,8 @@
         var base = (window.__FOODY__ && window.__FOODY__.FOODY_API) || window.foodyApi || '';
         if (!base) throw new Error('FOODY_API missing');
         var fd = new FormData(); fd.append('file', file);
-        var r = await fetch(base.replace(/\/+$/,'') + '/upload', { method:'POST', body: fd });
+        var key = localStorage.getItem('foody_key') || '';
+        var r = await fetch(base.replace(/\/+$/,'') + '/upload', { method:'POST', body: fd, headers: key ? { 'X-Foody-Key': key } : {} });
         if (!r.ok) throw new Error('Upload failed ' + r.status);
         var j = await r.json(); hidden.value = (j && (j.url || j.Location || j.location)) || '';
       } catch(e){ console.warn('upload failed', e); hidden.value=''; try{pond.removeFile();}catch(_){}} }